@@ -6,16 +6,29 @@ must follow. This ensures the web UI works identically regardless of mode.
 """
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from collections import OrderedDict, deque
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Deque, Dict, Any, List, Optional, Tuple
 from enum import Enum
 import time
 import uuid
 import asyncio
+import itertools
 import logging
 import traceback
 
 
+# Command IDs are a per-process random prefix plus a counter: unique across
+# restarts without paying for a uuid4 (urandom read + formatting) per command
+_ID_PREFIX = uuid.uuid4().hex[:12]
+_ID_COUNTER = itertools.count()
+
+
+def next_command_id() -> str:
+    """Return a new unique command ID."""
+    return f"{_ID_PREFIX}{next(_ID_COUNTER):x}"
+
+
 class CommandStatus(Enum):
     """Status of a hardware command."""
     PENDING = "pending"
@@ -32,7 +45,7 @@ class SystemStatus(Enum):
     EMERGENCY_STOP = "emergency_stop"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Position:
     """3D position coordinates."""
     x: float
@@ -40,7 +53,11 @@ class Position:
     z: float
 
 
-@dataclass
+# Immutable, so every reset-to-origin can share one instance
+ORIGIN = Position(0.0, 0.0, 0.0)
+
+
+@dataclass(slots=True, frozen=True)
 class CommandAck:
     """Command acknowledgment."""
     id: str
@@ -50,7 +67,7 @@ class CommandAck:
     stack_trace: Optional[str] = None  # For error diagnostics
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TelemetryData:
     """Telemetry data structure."""
     timestamp: float
@@ -82,11 +99,47 @@ class HardwareInterface(ABC):
         self.config = config
         self.system_status = SystemStatus.IDLE
         self.emergency_stop_active = False
-        self.command_queue = []
+        self.command_queue: Deque[Dict[str, Any]] = deque()
         self.current_command_id: Optional[str] = None
-        self.command_history: Dict[str, CommandAck] = {}
+        # Insertion-ordered (oldest first) and capped so long-running servers don't grow unbounded
+        self.command_history: Dict[str, CommandAck] = OrderedDict()
+        self._history_cap = config.get('command_history_cap', 10000)
+        # Collapse runs of same-type queued moves into the last one (jogging)
+        self._coalesce_moves = config.get('coalesce_moves', False)
+        # Formatting a traceback per failed command is costly when e.g. the printer
+        # is offline and every command fails; only do it when asked (or at DEBUG)
+        self._capture_traceback = config.get('capture_traceback', False)
         self._queue_lock = asyncio.Lock()
         self.logger = logging.getLogger(f"{self.__class__.__name__}")
+    
+    @property
+    def system_status(self) -> SystemStatus:
+        """Overall system status."""
+        return self._system_status
+    
+    @system_status.setter
+    def system_status(self, status: SystemStatus) -> None:
+        # Cache the wire value so status polling doesn't touch the enum
+        self._system_status = status
+        self._status_str = status.value
+    
+    # Command routing tables for process_command_queue (command type -> function of (self, params))
+    _SAFETY_CHECKS = {
+        'move_nozzle': lambda self, p: self.check_nozzle_limits(p['x'], p['y'], p['z']),
+        'move_nozzle_xy': lambda self, p: self.check_nozzle_limits(p['x'], p['y'], 0),  # Z unchanged
+        'move_nozzle_z': lambda self, p: self.check_nozzle_limits(0, 0, p['z']),  # XY unchanged
+        'move_path': lambda self, p: all(self.check_nozzle_limits(x, y, z) for x, y, z in p['points']),
+    }
+    # Absolute moves where a later queued command of the same type makes earlier ones redundant
+    _COALESCIBLE = frozenset(('move_nozzle', 'move_nozzle_xy', 'move_nozzle_z'))
+    _DISPATCH = {
+        # Limits were checked via _SAFETY_CHECKS
+        'move_nozzle': lambda self, p: self._move_nozzle_unchecked(**p),
+        'move_nozzle_xy': lambda self, p: self.move_nozzle_xy(**p),
+        'move_nozzle_z': lambda self, p: self.move_nozzle_z(**p),
+        'move_path': lambda self, p: self._move_path_unchecked(**p),
+        'emergency_stop': lambda self, p: self.emergency_stop(),
+    }
         
     @abstractmethod
     async def initialize(self) -> bool:
@@ -125,6 +178,15 @@ class HardwareInterface(ABC):
         """
         pass
     
+    async def _move_nozzle_unchecked(self, x: float, y: float, z: float, feedrate: int) -> CommandAck:
+        """
+        Move nozzle to a position that has already passed check_nozzle_limits.
+        
+        Used by process_command_queue to avoid re-checking limits. Defaults to
+        move_nozzle; implementations may override to skip their own check.
+        """
+        return await self.move_nozzle(x, y, z, feedrate)
+    
     @abstractmethod
     async def move_nozzle_xy(self, x: float, y: float, feedrate: int) -> CommandAck:
         """
@@ -154,6 +216,36 @@ class HardwareInterface(ABC):
         """
         pass
     
+    async def move_path(self, points: List[Tuple[float, float, float]], feedrate: int) -> CommandAck:
+        """
+        Move through a sequence of positions as a single command.
+        
+        Every point is checked against safe limits before any motion starts.
+        
+        Args:
+            points: (x, y, z) positions in mm, visited in order
+            feedrate: Movement speed in mm/min
+            
+        Returns:
+            CommandAck: One acknowledgment for the whole path
+        """
+        if not all(self.check_nozzle_limits(x, y, z) for x, y, z in points):
+            return self._ack(CommandStatus.ERROR, "Position outside safe limits")
+        return await self._move_path_unchecked(points, feedrate)
+    
+    async def _move_path_unchecked(self, points: List[Tuple[float, float, float]], feedrate: int) -> CommandAck:
+        """
+        Move through points that have already passed check_nozzle_limits.
+        
+        Defaults to one _move_nozzle_unchecked per point, stopping at the first
+        failure; implementations may override to send or simulate the path at once.
+        """
+        for x, y, z in points:
+            ack = await self._move_nozzle_unchecked(x, y, z, feedrate)
+            if ack.status != CommandStatus.OK:
+                return ack
+        return self._ack(CommandStatus.OK, f"Path of {len(points)} moves completed")
+    
     @abstractmethod
     async def get_nozzle_position(self) -> Position:
         """
@@ -237,6 +329,28 @@ class HardwareInterface(ABC):
         """
         pass
     
+    async def telemetry_stream(self, interval: float = 0.5) -> AsyncIterator[TelemetryData]:
+        """
+        Sample get_telemetry every interval seconds, yielding only on change.
+        
+        A sample is yielded when the nozzle position, status or error message
+        differs from the last one yielded, so an idle machine produces nothing.
+        
+        Args:
+            interval: Seconds between samples
+        
+        Yields:
+            TelemetryData: Telemetry that differs from the previous yield
+        """
+        last = None
+        while True:
+            telemetry = await self.get_telemetry()
+            if (last is None or telemetry.nozzle != last.nozzle or telemetry.status != last.status
+                    or telemetry.error_message != last.error_message):
+                last = telemetry
+                yield telemetry
+            await asyncio.sleep(interval)
+    
     @abstractmethod
     async def is_ready(self) -> bool:
         """
@@ -277,25 +391,26 @@ class HardwareInterface(ABC):
             **kwargs: Command parameters
             
         Returns:
-            str: Command ID (UUID4 for uniqueness)
+            str: Command ID (see next_command_id)
         """
-        command_id = str(uuid.uuid4())
+        command_id = next_command_id()
         command = {
             'id': command_id,
             'type': command_type,
             'params': kwargs,
-            'timestamp': time.time()
+            'timestamp': time.monotonic()  # Internal only; ack timestamps stay wall-clock for clients
         }
         
+        # History is only touched from the event loop thread, so the pending ack
+        # doesn't need the queue lock (_finalize_command writes it unlocked too)
+        self._record_history(CommandAck(
+            id=command_id,
+            status=CommandStatus.PENDING,
+            message="Command queued",
+            timestamp=time.time()
+        ))
         async with self._queue_lock:
             self.command_queue.append(command)
-            # Create pending ack
-            self.command_history[command_id] = CommandAck(
-                id=command_id,
-                status=CommandStatus.PENDING,
-                message="Command queued",
-                timestamp=time.time()
-            )
         
         return command_id
     
@@ -304,6 +419,9 @@ class HardwareInterface(ABC):
         Process the next command in the queue.
         
         Performs safety checks before dispatch and updates system status.
+        With 'coalesce_moves' enabled, consecutive queued moves of the same type
+        are collapsed into the last one, so only its target is checked and sent;
+        the absorbed commands are finalized with its outcome.
         
         Returns:
             CommandAck: Command acknowledgment if command processed, None if queue empty
@@ -312,93 +430,101 @@ class HardwareInterface(ABC):
             if not self.command_queue or self.current_command_id:
                 return None
                 
-            command = self.command_queue.pop(0)
+            command = self.command_queue.popleft()
+            superseded = []
+            if self._coalesce_moves and command['type'] in self._COALESCIBLE:
+                while self.command_queue and self.command_queue[0]['type'] == command['type']:
+                    superseded.append(command)
+                    command = self.command_queue.popleft()
             self.current_command_id = command['id']
         
         # Update system status to MOVING
         self.system_status = SystemStatus.MOVING
         
         try:
+            cmd_type = command['type']
+            params = command['params']
+            
             # Safety checks before dispatch
-            if command['type'] in ['move_nozzle', 'move_nozzle_xy', 'move_nozzle_z']:
-                params = command['params']
-                if command['type'] == 'move_nozzle':
-                    if not self.check_nozzle_limits(params['x'], params['y'], params['z']):
-                        ack = CommandAck(
-                            id=command['id'],
-                            status=CommandStatus.ERROR,
-                            message="Position outside safe limits",
-                            timestamp=time.time()
-                        )
-                        return self._finalize_command(ack)
-                elif command['type'] == 'move_nozzle_xy':
-                    if not self.check_nozzle_limits(params['x'], params['y'], 0):  # Z unchanged
-                        ack = CommandAck(
-                            id=command['id'],
-                            status=CommandStatus.ERROR,
-                            message="Position outside safe limits",
-                            timestamp=time.time()
-                        )
-                        return self._finalize_command(ack)
-                elif command['type'] == 'move_nozzle_z':
-                    if not self.check_nozzle_limits(0, 0, params['z']):  # XY unchanged
-                        ack = CommandAck(
-                            id=command['id'],
-                            status=CommandStatus.ERROR,
-                            message="Position outside safe limits",
-                            timestamp=time.time()
-                        )
-                        return self._finalize_command(ack)
+            check = self._SAFETY_CHECKS.get(cmd_type)
+            handler = self._DISPATCH.get(cmd_type)
+            if check is not None and not check(self, params):
+                ack = CommandAck(
+                    id=command['id'],
+                    status=CommandStatus.ERROR,
+                    message="Position outside safe limits",
+                    timestamp=time.time()
+                )
             
             # Check emergency stop before any operation
-            if self.emergency_stop_active:
+            elif self.emergency_stop_active:
                 ack = CommandAck(
                     id=command['id'],
                     status=CommandStatus.ERROR,
                     message="Emergency stop active",
                     timestamp=time.time()
                 )
-                return self._finalize_command(ack)
             
             # Route command to appropriate method
-            if command['type'] == 'move_nozzle':
-                ack = await self.move_nozzle(**command['params'])
-            elif command['type'] == 'move_nozzle_xy':
-                ack = await self.move_nozzle_xy(**command['params'])
-            elif command['type'] == 'move_nozzle_z':
-                ack = await self.move_nozzle_z(**command['params'])
-            elif command['type'] == 'emergency_stop':
-                ack = await self.emergency_stop()
+            elif handler is not None:
+                ack = await handler(self, params)
+                # Report under the queued ID so the pending history entry is resolved
+                ack = replace(ack, id=command['id'])
             else:
                 ack = CommandAck(
                     id=command['id'],
                     status=CommandStatus.ERROR,
-                    message=f"Unknown command type: {command['type']}",
+                    message=f"Unknown command type: {cmd_type}",
                     timestamp=time.time()
                 )
         except Exception as e:
             # Log exception for diagnostics
-            self.logger.error(f"Command {command['id']} failed: {e}", exc_info=True)
+            capture = self._capture_traceback or self.logger.isEnabledFor(logging.DEBUG)
+            self.logger.error("Command %s failed: %s", command['id'], e, exc_info=capture)
             ack = CommandAck(
                 id=command['id'],
                 status=CommandStatus.ERROR,
                 message=str(e),
                 timestamp=time.time(),
-                stack_trace=traceback.format_exc()
+                stack_trace=traceback.format_exc() if capture else None
             )
         finally:
             # Update system status back to IDLE
             if not self.emergency_stop_active:
                 self.system_status = SystemStatus.IDLE
             self.current_command_id = None
-            
+        
+        # Absorbed moves share the outcome of the move that replaced them
+        for skipped in superseded:
+            self._finalize_command(CommandAck(
+                id=skipped['id'],
+                status=ack.status,
+                message=f"Coalesced into command {command['id']}: {ack.message}",
+                timestamp=time.time()
+            ))
+        
         return self._finalize_command(ack)
     
+    def _ack(self, status: CommandStatus, message: str) -> CommandAck:
+        """Build a CommandAck with a fresh command ID, timestamped now."""
+        return CommandAck(
+            id=next_command_id(),
+            status=status,
+            message=message,
+            timestamp=time.time()
+        )
+    
     def _finalize_command(self, ack: CommandAck) -> CommandAck:
         """Store command result in history and return ack."""
-        self.command_history[ack.id] = ack
+        self._record_history(ack)
         return ack
     
+    def _record_history(self, ack: CommandAck) -> None:
+        """Insert or update an ack in history, evicting the oldest entries past the cap."""
+        self.command_history[ack.id] = ack
+        while len(self.command_history) > self._history_cap:
+            self.command_history.popitem(last=False)
+    
     def get_queue_status(self) -> Dict[str, Any]:
         """
         Get current command queue status.
@@ -409,7 +535,7 @@ class HardwareInterface(ABC):
         return {
             'queue_length': len(self.command_queue),
             'current_command_id': self.current_command_id,
-            'system_status': self.system_status.value,
+            'system_status': self._status_str,
             'emergency_stop': self.emergency_stop_active,
             'command_history_size': len(self.command_history)
         }
@@ -436,10 +562,5 @@ class HardwareInterface(ABC):
         Returns:
             Dict: Recent command history (command_id -> CommandAck)
         """
-        # Return most recent commands
-        sorted_commands = sorted(
-            self.command_history.items(),
-            key=lambda x: x[1].timestamp,
-            reverse=True
-        )
-        return dict(sorted_commands[:limit])
+        # History is kept in insertion order, so the newest entries are at the end
+        return dict(itertools.islice(reversed(self.command_history.items()), limit))
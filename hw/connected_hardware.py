@@ -5,16 +5,77 @@ Controls actual hardware via pigpio, pyserial, and picamera2.
 """
 
 import asyncio
+import os
+import re
 import time
 import serial
+from dataclasses import replace
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 import pigpio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from .abstract_hardware import (
-    HardwareInterface, Position, CommandAck, 
+    HardwareInterface, Position, ORIGIN, CommandAck, 
     CommandStatus, SystemStatus, TelemetryData
 )
 
 
+# G1 = Linear move, F = feedrate (speed). Formatted straight to bytes so the
+# move path skips building a str and encoding it.
+_GCODE_G1 = b"G1 X%.3f Y%.3f Z%.3f F%d\n"
+# Single-axis-group moves only send the axes that change
+_GCODE_G1_XY = b"G1 X%.3f Y%.3f F%d\n"
+_GCODE_G1_XZ = b"G1 X%.3f Z%.3f F%d\n"
+_GCODE_G1_Y = b"G1 Y%.3f F%d\n"
+_GCODE_G1_Z = b"G1 Z%.3f F%d\n"
+
+# Targets closer than this (mm) to the current position are treated as no-op moves
+_POS_EPSILON = 1e-4
+
+_NOT_READY_STATUSES = frozenset((SystemStatus.ERROR, SystemStatus.EMERGENCY_STOP))
+
+# M105 reply fields: T = current nozzle temp, B = current bed temp
+_TEMP_RE = re.compile(rb'T:([\d.]+)')
+_BED_RE = re.compile(rb'B:([\d.]+)')
+# Port read timeout: how long one read() may block waiting for a first byte,
+# and so how far a reply wait can overrun its deadline
+_READ_TIMEOUT_S = 0.1
+# get_temperature() answers from the last seen report when it is newer than this
+_TEMP_MAX_AGE_NS = 1_000_000_000
+
+
+def _temp_field(line: bytes, key: bytes) -> Optional[float]:
+    """Read the value after key (e.g. b'T:') up to the next space; None if key is absent."""
+    start = line.find(key)
+    if start < 0:
+        return None
+    start += len(key)
+    end = line.find(b' ', start)
+    return float(line[start:end] if end >= 0 else line[start:])
+
+
+def _parse_temperature(line: bytes) -> Optional[Dict[str, float]]:
+    """
+    Parse nozzle and bed temperatures from an M105 reply line.
+    
+    Marlin-style firmware separates fields with spaces ("T:25.0 /200.0 B:60.0 /60.0"),
+    so plain find() slicing covers it; other layouts fall back to the regexes.
+    """
+    try:
+        nozzle = _temp_field(line, b'T:')
+        bed = _temp_field(line, b'B:')
+    except ValueError:
+        temp_match = _TEMP_RE.search(line)
+        bed_match = _BED_RE.search(line)
+        if not (temp_match and bed_match):
+            return None
+        nozzle = float(temp_match.group(1))
+        bed = float(bed_match.group(1))
+    if nozzle is None or bed is None:
+        return None
+    return {'nozzle_temp': nozzle, 'bed_temp': bed}
+
+
 class ConnectedHardware(HardwareInterface):
     """Connected hardware implementation for real hardware control."""
     
@@ -22,26 +83,42 @@ class ConnectedHardware(HardwareInterface):
         super().__init__(config)
         self.pi: Optional[pigpio.pi] = None
         self.printer_serial: Optional[serial.Serial] = None
-        self.nozzle_pos = Position(0.0, 0.0, 0.0)
+        # Connection flags for is_ready(), updated on initialize/shutdown only
+        self._pi_connected = False
+        self._serial_open = False
+        self._estop_cb = None  # pigpio callback handle for the e-stop pin
+        # Event loop the hardware was initialized on; pigpio callbacks schedule onto it
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.nozzle_pos = ORIGIN
+        # True once the printer has acknowledged the move/home that set nozzle_pos
+        self._pos_confirmed = False
         self.nozzle_moving = False
         self.camera_streaming = False
         self.stream_url = None
-        self._loop = None  # Will be set to current event loop when needed
-        
-    def _get_loop(self):
-        """Get the current event loop, creating one if necessary."""
-        if self._loop is None:
-            try:
-                self._loop = asyncio.get_event_loop()
-            except RuntimeError:
-                self._loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(self._loop)
-        return self._loop
-    
-    async def _run_in_executor(self, func, *args):
-        """Run a blocking function in a thread executor."""
-        loop = self._get_loop()
-        return await loop.run_in_executor(None, func, *args)
+        # Single worker thread so all serial I/O is serialized on one port
+        # and never runs on the event loop
+        self._serial_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="printer_serial", initializer=self._tune_serial_thread
+        )
+        self._rx_buf = bytearray()  # Serial reply bytes not yet split into lines
+        # Last temperature report seen in any reply, and when (monotonic ns)
+        self._temps: Optional[Dict[str, float]] = None
+        self._temps_ns = 0
+        # Safe limits are read once; check_nozzle_limits runs on every move
+        limits = self.config['printer']['safe_limits']
+        # (as floats, so YAML ints don't force mixed int/float comparisons)
+        self._limits = tuple(float(limits[key]) for key in (
+            'x_min', 'x_max', 'y_min', 'y_max', 'z_min', 'z_max'
+        ))
+        self._swap_yz = bool(self.config['printer'].get('swap_yz_axes', False))
+        # Moves allowed to be awaiting their 'ok' (Marlin queues them in its
+        # planner); 0 waits for every move's 'ok' before returning
+        self._pipeline_depth = max(0, int(self.config['printer'].get('move_pipeline_depth', 0)))
+        self._unacked = 0  # 'ok's still owed to pipelined moves (serial thread only)
+        
+    async def _run_serial(self, func, *args):
+        """Run a blocking serial operation on the dedicated serial thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._serial_executor, func, *args)
     
     async def initialize(self) -> bool:
         """Initialize connected hardware following Anycubic Kobra 2 Neo initialization pattern."""
@@ -49,73 +126,142 @@ class ConnectedHardware(HardwareInterface):
         self.pi = pigpio.pi()
         if not self.pi.connected:
             raise RuntimeError("Failed to connect to pigpio daemon")
+        self._pi_connected = True
+        
+        # Configure GPIO pins (emergency stop button) before any motion
+        self._loop = asyncio.get_running_loop()
+        if 'emergency_stop' in self.config:
+            self._setup_gpio_pins()
         
         # Initialize serial connection to printer
         serial_port = self.config['printer']['serial_device']
         baud_rate = self.config['printer'].get('baud_rate', 115200)
         
-        print(f"Connecting to {serial_port} at {baud_rate}...")
+        self.logger.info("Connecting to %s at %s...", serial_port, baud_rate)
         
         # Serial.Serial() is blocking, run it in executor
-        def _open_serial():
-            return serial.Serial(
-                port=serial_port,
-                baudrate=baud_rate,
-                timeout=1
-            )
-        
-        self.printer_serial = await self._run_in_executor(_open_serial)
+        self.printer_serial = await self._run_serial(
+            partial(serial.Serial, port=serial_port, baudrate=baud_rate, timeout=_READ_TIMEOUT_S)
+        )
+        self._serial_open = self.printer_serial.is_open
+        if self.config['printer'].get('low_latency', True):
+            await self._run_serial(self._enable_low_latency, serial_port)
         
         # CRITICAL: When you open the port, the printer usually reboots (DTR reset).
-        # We must wait a few seconds for it to be ready.
+        # We must wait a few seconds for it to be ready: Marlin prints "start"
+        # before its setup output is done, so that is no signal to go ahead.
         # Use asyncio.sleep instead of time.sleep to avoid blocking the event loop
-        print("Waiting for printer to initialize after connection (3 seconds)...")
+        self.logger.info("Waiting for printer to initialize after connection (3 seconds)...")
         await asyncio.sleep(3)
         
         # Clear any startup text (like "Marlin x.x.x" or boot messages)
         # reset_input_buffer() is blocking, run it in executor
-        await self._run_in_executor(self.printer_serial.reset_input_buffer)
-        print("Printer connected and ready.\n")
+        await self._run_serial(self.printer_serial.reset_input_buffer)
+        self._rx_buf.clear()
+        self._unacked = 0
+        self.logger.info("Printer connected and ready.")
         
         # Set safe modes: G21 (millimeters) and G90 (absolute positioning)
-        print("Setting safe modes (G21: millimeters, G90: absolute positioning)...")
-        ack1 = await self._send_gcode("G21")  # Set units to Millimeters
-        ack2 = await self._send_gcode("G90")  # Set to Absolute Positioning
+        self.logger.info("Setting safe modes (G21: millimeters, G90: absolute positioning)...")
+        # G21 = Set units to Millimeters, G90 = Set to Absolute Positioning
+        # Sent in one write; the printer replies with one 'ok' per command
+        ack = await self._send_gcodes_batched(["G21", "G90"])
         
-        if ack1.status != CommandStatus.OK or ack2.status != CommandStatus.OK:
-            print(f"WARNING: Failed to set safe modes. G21: {ack1.status}, G90: {ack2.status}")
-            print("Continuing anyway - printer may already be in correct mode.")
+        if ack.status != CommandStatus.OK:
+            self.logger.warning("Failed to set safe modes: %s. Continuing anyway - "
+                                "printer may already be in correct mode.", ack.message)
         
         # Automatically home the nozzle on initialization
         # Note: This may take 30-60 seconds depending on printer
-        print("\nHoming nozzle to origin (0, 0, 0)...")
-        print("(This may take 30-60 seconds - please wait...)")
+        self.logger.info("Homing nozzle to origin (0, 0, 0) - this may take 30-60 seconds...")
         ack = await self.home_nozzle()
         if ack.status != CommandStatus.OK:
-            print(f"WARNING: Homing failed during initialization: {ack.message}")
-            print("Server will continue, but nozzle may not be at origin. You can manually home later.")
+            self.logger.warning("Homing failed during initialization: %s. Server will continue, but "
+                                "nozzle may not be at origin. You can manually home later.", ack.message)
             # Don't raise error - allow server to start even if homing fails
             # The user can manually home if needed
         else:
-            print("Nozzle homed successfully")
+            self.logger.info("Nozzle homed successfully")
         
-        # Configure GPIO pins (if needed for other features)
         return True
     
     async def shutdown(self) -> bool:
         """Shutdown connected hardware."""
+        self._pi_connected = False
+        self._serial_open = False
+        if self._estop_cb is not None:
+            self._estop_cb.cancel()
+            self._estop_cb = None
         if self.printer_serial and self.printer_serial.is_open:
             # Serial.close() is blocking, run it in executor
-            await self._run_in_executor(self.printer_serial.close)
+            await self._run_serial(self.printer_serial.close)
+        self._serial_executor.shutdown(wait=False)
         if self.pi:
             self.pi.stop()
         return True
     
+    def _tune_serial_thread(self):
+        """
+        Optionally pin the serial thread to CPUs and give it a real-time
+        priority, so 'ok' handling isn't delayed by other work on the Pi.
+        
+        Runs once in the serial thread (executor initializer). Both settings
+        are opt-in; SCHED_FIFO needs root or CAP_SYS_NICE. Failures are
+        logged and ignored, since an exception here would break the executor.
+        """
+        printer = self.config['printer']
+        cpus = printer.get('serial_thread_cpus')
+        priority = int(printer.get('serial_thread_rt_priority', 0))
+        try:
+            if cpus:
+                # pid 0 = the calling thread on Linux
+                os.sched_setaffinity(0, set(cpus))
+            if priority > 0:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        except (AttributeError, OSError, ValueError) as e:
+            self.logger.warning("Could not apply serial thread CPU/priority settings: %s", e)
+    
+    def _enable_low_latency(self, port: str):
+        """
+        Best-effort: stop the USB serial driver from holding back short replies
+        (serial thread only).
+        
+        Every move waits for an 'ok', so driver buffering delay is added to each
+        round trip. FTDI adapters wait up to latency_timer ms (default 16) before
+        passing on a short reply. Failures are ignored (e.g. CDC-ACM ports
+        without the ioctl, or no write access to sysfs).
+        """
+        try:
+            # Sets ASYNC_LOW_LATENCY via TIOCGSERIAL/TIOCSSERIAL (Linux only)
+            self.printer_serial.set_low_latency_mode(True)
+        except (AttributeError, NotImplementedError, OSError, ValueError) as e:
+            self.logger.debug("Serial low-latency mode not available: %s", e)
+        
+        name = os.path.basename(os.path.realpath(port))
+        try:
+            with open(f"/sys/bus/usb-serial/devices/{name}/latency_timer", "w") as f:
+                f.write("1")
+        except OSError as e:
+            self.logger.debug("Could not lower USB latency_timer for %s: %s", name, e)
+    
     def _setup_gpio_pins(self):
         """Setup GPIO pins."""
-        # Configure emergency stop pin
-        self.pi.set_mode(self.config['emergency_stop']['gpio_pin'], pigpio.INPUT)
-        self.pi.set_pull_up_down(self.config['emergency_stop']['gpio_pin'], pigpio.PUD_UP)
+        # Configure emergency stop pin (one-time pigpiod round trips)
+        pin = self.config['emergency_stop']['gpio_pin']
+        self.pi.set_mode(pin, pigpio.INPUT)
+        self.pi.set_pull_up_down(pin, pigpio.PUD_UP)
+        # Button pulls the pin low; pigpiod pushes the edge to us instead of us
+        # polling it, so there is no per-read RPC to optimize away
+        self._estop_cb = self.pi.callback(pin, pigpio.FALLING_EDGE, self._on_estop_pin)
+    
+    def _on_estop_pin(self, gpio: int, level: int, tick: int):
+        """
+        pigpio callback for the emergency stop button (runs on pigpio's thread).
+        
+        Schedules emergency_stop() on the hardware's event loop, the same path
+        as the UI's cmd.emergency_stop.
+        """
+        asyncio.run_coroutine_threadsafe(self.emergency_stop(), self._loop)
     
     async def _send_gcode(self, command: str, timeout: float = 5.0) -> CommandAck:
         """
@@ -125,8 +271,8 @@ class ConnectedHardware(HardwareInterface):
         - Send command with newline
         - Read responses until we get 'ok' or timeout
         
-        All blocking serial operations are run in a thread executor to avoid
-        blocking the event loop.
+        All blocking serial operations are run on the dedicated serial thread
+        to avoid blocking the event loop.
         
         Args:
             command: G-code command (without newline)
@@ -135,108 +281,321 @@ class ConnectedHardware(HardwareInterface):
         Returns:
             CommandAck with status OK if 'ok' received, ERROR otherwise
         """
+        # G-code must end with a newline character (\n)
+        return await self._send_gcode_bytes(f"{command}\n".encode('utf-8'), timeout)
+    
+    async def _send_gcodes_batched(self, commands: List[str], timeout: float = 5.0) -> CommandAck:
+        """
+        Send several G-code commands in a single write and wait for an 'ok' for each.
+        
+        Args:
+            commands: G-code commands (without newlines)
+            timeout: Maximum time to wait for all 'ok' responses (seconds)
+            
+        Returns:
+            CommandAck with status OK if every command was acknowledged, ERROR otherwise
+        """
         if not self.printer_serial or not self.printer_serial.is_open:
-            return CommandAck(
-                id=f"gcode_{int(time.time() * 1000)}",
-                status=CommandStatus.ERROR,
-                message="Printer serial port not open",
-                timestamp=time.time()
+            return self._ack(CommandStatus.ERROR, "Printer serial port not open")
+        
+        payload = "".join(f"{command}\n" for command in commands).encode('utf-8')
+        label = ", ".join(commands)
+        try:
+            line, _ = await self._run_serial(self._transact, payload, timeout, len(commands))
+        except (serial.SerialException, OSError) as e:
+            return self._ack(CommandStatus.ERROR, f"Serial error: {e}")
+        
+        if line is None:
+            return self._ack(CommandStatus.ERROR, f"Timeout waiting for 'ok' responses to '{label}'")
+        if line.startswith(b'ok'):
+            return self._ack(CommandStatus.OK, f"Commands '{label}' completed")
+        return self._ack(CommandStatus.ERROR, f"Printer error: {line.decode('utf-8', 'replace')}")
+    
+    async def _send_gcode_bytes(self, payload: bytes, timeout: float = 5.0,
+                                pipelined: bool = False) -> CommandAck:
+        """
+        Send a pre-encoded, newline-terminated G-code command and wait for 'ok'.
+        
+        Used directly by the move path with the module-level byte templates;
+        the command is only decoded for the ack message. With pipelined=True
+        (and move_pipeline_depth set) the command returns once it is written,
+        unless that would leave more than move_pipeline_depth 'ok's outstanding.
+        """
+        if not self.printer_serial or not self.printer_serial.is_open:
+            return self._ack(CommandStatus.ERROR, "Printer serial port not open")
+        
+        # Write and wait for the reply in one trip to the serial thread; the
+        # coroutine is woken once, as soon as 'ok' (or an error) arrives
+        try:
+            if pipelined and self._pipeline_depth:
+                line, _ = await self._run_serial(self._transact_pipelined, payload, timeout)
+            else:
+                line, _ = await self._run_serial(self._transact, payload, timeout)
+        except (serial.SerialException, OSError) as e:
+            return self._ack(CommandStatus.ERROR, f"Serial error: {e}")
+        
+        if line is None:
+            # Timeout - no 'ok' received
+            return self._ack(
+                CommandStatus.ERROR,
+                f"Timeout waiting for 'ok' response to '{payload.decode('ascii', 'replace').rstrip()}'"
             )
+        # Standard Marlin firmware replies with "ok" when done
+        if line.startswith(b'ok'):
+            return self._ack(CommandStatus.OK, f"Command '{payload.decode('ascii', 'replace').rstrip()}' completed")
+        return self._ack(CommandStatus.ERROR, f"Printer error: {line.decode('utf-8', 'replace')}")
+    
+    def _transact(self, payload: bytes, timeout: float,
+                  expected_oks: int = 1) -> Tuple[Optional[bytes], List[bytes]]:
+        """
+        Write a command and read reply lines until 'ok' or an error line.
         
-        command_id = f"gcode_{int(time.time() * 1000)}"
-        start_time = time.time()
+        Blocking; must only run on the serial thread (see _run_serial), which
+        keeps each command's write and its replies together on the port. Any
+        'ok's still owed to pipelined moves are consumed first.
         
-        # G-code must end with a newline character (\n)
-        full_command = f"{command}\n"
-        
-        # Serial.write() is blocking, run it in executor
-        def _write_command():
-            self.printer_serial.write(full_command.encode('utf-8'))
-        
-        await self._run_in_executor(_write_command)
-        
-        # Read the response lines until we get 'ok' or timeout
-        # Use asyncio.sleep instead of time.sleep in the loop
-        while (time.time() - start_time) < timeout:
-            try:
-                # Serial.readline() is blocking, run it in executor
-                def _read_line():
-                    return self.printer_serial.readline().decode('utf-8').strip()
-                
-                line = await self._run_in_executor(_read_line)
-                
-                if line:
-                    # Standard Marlin firmware replies with "ok" when done
-                    if line.lower().startswith('ok'):
-                        return CommandAck(
-                            id=command_id,
-                            status=CommandStatus.OK,
-                            message=f"Command '{command}' completed",
-                            timestamp=time.time()
-                        )
-                    # Check for error responses
-                    if 'error' in line.lower() or 'resend' in line.lower():
-                        return CommandAck(
-                            id=command_id,
-                            status=CommandStatus.ERROR,
-                            message=f"Printer error: {line}",
-                            timestamp=time.time()
-                        )
-            except Exception as e:
-                # If readline times out or fails, continue waiting
-                await asyncio.sleep(0.1)
+        Args:
+            payload: Encoded command, newline-terminated
+            timeout: Maximum time to wait for the terminating line (seconds)
+            expected_oks: Number of 'ok' lines to wait for (one per command
+                when payload holds several commands)
+            
+        Returns:
+            (terminating 'ok'/'error'/'resend' line or None on timeout,
+             non-empty lines received before it), as stripped raw bytes
+            
+        Raises:
+            serial.SerialException / OSError: if the port fails
+        """
+        deadline_ns = time.monotonic_ns() + int(timeout * 1e9)
+        self.printer_serial.write(payload)
+        # 'ok's still owed to pipelined moves arrive ahead of this command's own
+        line, lines, missing = self._read_oks(deadline_ns, self._unacked + expected_oks)
+        # On a timeout the owed 'ok's are taken as lost, rather than waited
+        # for (and timed out on) by every later command
+        self._unacked = max(0, missing - expected_oks) if line is not None else 0
+        return line, lines
+    
+    def _transact_pipelined(self, payload: bytes, timeout: float) -> Tuple[Optional[bytes], List[bytes]]:
+        """
+        Write a command without waiting for its own 'ok' (serial thread only).
+        
+        Only blocks, reading 'ok's owed to earlier commands, once more than
+        move_pipeline_depth would be outstanding. An error reported here may
+        belong to any of the outstanding commands.
+        
+        Returns:
+            Same shape as _transact; (b'ok', []) when nothing had to be read
+        """
+        deadline_ns = time.monotonic_ns() + int(timeout * 1e9)
+        self.printer_serial.write(payload)
+        excess = self._unacked + 1 - self._pipeline_depth
+        if excess <= 0:
+            self._unacked += 1
+            return b'ok', []
+        line, lines, missing = self._read_oks(deadline_ns, excess)
+        self._unacked = self._pipeline_depth + missing if line is not None else 0
+        return line, lines
+    
+    def _transact_path(self, payloads: List[bytes], timeout: float) -> Tuple[Optional[bytes], List[bytes]]:
+        """
+        Write path moves while keeping at most move_pipeline_depth (at least
+        one) unacknowledged, then wait for the rest (serial thread only).
+        
+        The printer's receive buffer is small and USB serial has no flow
+        control, so a whole path written at once could overflow it and drop
+        moves. timeout applies to each wait for an 'ok'.
+        
+        Returns:
+            Same shape as _transact
+        """
+        window = max(1, self._pipeline_depth)
+        timeout_ns = int(timeout * 1e9)
+        lines = []
+        line = b'ok'
+        # 'ok's still owed to earlier pipelined moves count against the window
+        for i, payload in enumerate(payloads):
+            self.printer_serial.write(payload)
+            self._unacked += 1
+            # Read down to a full window before the next move, or to nothing after the last
+            target = 0 if i == len(payloads) - 1 else window - 1
+            if self._unacked > target:
+                line, more, missing = self._read_oks(time.monotonic_ns() + timeout_ns, self._unacked - target)
+                lines += more
+                if line is None:
+                    self._unacked = 0
+                    return None, lines
+                self._unacked = target + missing
+                if not line.startswith(b'ok'):
+                    return line, lines
+        return line, lines
+    
+    def _reset_reply_state(self):
+        """Forget owed 'ok's and buffered reply bytes (serial thread only)."""
+        self._unacked = 0
+        self._rx_buf.clear()
+    
+    def _read_oks(self, deadline_ns: int, count: int) -> Tuple[Optional[bytes], List[bytes], int]:
+        """
+        Read reply lines until count 'ok's or an error line (serial thread only).
+        
+        Returns:
+            (terminating 'ok'/'error'/'resend' line or None on timeout,
+             non-empty lines received before it, 'ok's not yet seen)
+        """
+        lines = []
+        for line in self._iter_reply_lines(deadline_ns):
+            if b'T:' in line:
+                # Temperature reports can arrive with any reply; keep the latest
+                temps = _parse_temperature(line)
+                if temps is not None:
+                    self._temps = temps
+                    self._temps_ns = time.monotonic_ns()
+            # Printer chatter is ASCII and Marlin always sends a lowercase 'ok',
+            # so match on the raw bytes without decoding or lowercasing a copy
+            if line.startswith(b'ok'):
+                count -= 1
+                if count <= 0:
+                    return line, lines, 0
                 continue
+            if b'Error' in line or b'error' in line or b'Resend' in line or b'resend' in line:
+                return line, lines, count
+            lines.append(line)
+        return None, lines, count
+    
+    def _iter_reply_lines(self, deadline_ns: int) -> Iterator[bytes]:
+        """
+        Yield stripped, non-empty reply lines until time.monotonic_ns() reaches
+        deadline_ns (serial thread only).
         
-        # Timeout - no 'ok' received
-        return CommandAck(
-            id=command_id,
-            status=CommandStatus.ERROR,
-            message=f"Timeout waiting for 'ok' response to '{command}'",
-            timestamp=time.time()
-        )
+        Reads whatever is waiting in one call and splits lines out of a
+        persistent buffer, rather than pyserial's readline() which reads a
+        byte at a time. Bytes after the last complete line are kept for the
+        next command.
+        """
+        buf = self._rx_buf
+        start = 0
+        try:
+            while True:
+                nl = buf.find(b'\n', start)
+                if nl >= 0:
+                    end = nl
+                    if end > start and buf[end - 1] == 0x0D:  # trailing '\r'
+                        end -= 1
+                    # One copy straight out of the buffer; strip() hands back
+                    # the same object when there is nothing left to trim
+                    with memoryview(buf) as view:
+                        line = bytes(view[start:end]).strip()
+                    start = nl + 1
+                    if line:
+                        yield line
+                    continue
+                # No complete line buffered: drop consumed bytes and read more
+                del buf[:start]
+                start = 0
+                if time.monotonic_ns() >= deadline_ns:
+                    return
+                # Blocks up to the port timeout for the first byte. Read errors
+                # (e.g. the USB device went away) propagate rather than being
+                # retried until the deadline.
+                buf += self.printer_serial.read(self.printer_serial.in_waiting or 1)
+        finally:
+            del buf[:start]
     
     # Nozzle control methods
     async def move_nozzle(self, x: float, y: float, z: float, feedrate: int) -> CommandAck:
         """Move printer nozzle to specified position using G1 command."""
         if not self.check_nozzle_limits(x, y, z):
-            return CommandAck(
-                id=f"move_nozzle_{int(time.time() * 1000)}",
-                status=CommandStatus.ERROR,
-                message="Position outside safe limits",
-                timestamp=time.time()
-            )
-        
+            return self._ack(CommandStatus.ERROR, "Position outside safe limits")
+        return await self._move_nozzle_unchecked(x, y, z, feedrate)
+    
+    async def _move_nozzle_unchecked(self, x: float, y: float, z: float, feedrate: int) -> CommandAck:
+        """Send the G1 move; the caller has already validated the target against safe limits."""
+        # NOTE: If your printer has Y and Z axes physically swapped (swap_yz_axes),
+        # swap them in the G-code command. Position is always stored in our
+        # coordinate system regardless of how it's sent to the printer.
+        if self._swap_yz:
+            gcode = _GCODE_G1 % (x, z, y, feedrate)
+        else:
+            gcode = _GCODE_G1 % (x, y, z, feedrate)
+        return await self._send_move(gcode, Position(x, y, z))
+    
+    async def move_nozzle_xy(self, x: float, y: float, feedrate: int) -> CommandAck:
+        """Move printer nozzle XY only (Z unchanged)."""
+        z = self.nozzle_pos.z
+        if not self.check_nozzle_limits(x, y, z):
+            return self._ack(CommandStatus.ERROR, "Position outside safe limits")
+        # Only the moving axes are sent; with swapped axes our Y is the printer's Z
+        if self._swap_yz:
+            gcode = _GCODE_G1_XZ % (x, y, feedrate)
+        else:
+            gcode = _GCODE_G1_XY % (x, y, feedrate)
+        return await self._send_move(gcode, Position(x, y, z))
+    
+    async def move_nozzle_z(self, z: float, feedrate: int) -> CommandAck:
+        """Move printer nozzle Z only (XY unchanged)."""
+        pos = self.nozzle_pos
+        if not self.check_nozzle_limits(pos.x, pos.y, z):
+            return self._ack(CommandStatus.ERROR, "Position outside safe limits")
+        # With swapped axes our Z is the printer's Y
+        if self._swap_yz:
+            gcode = _GCODE_G1_Y % (z, feedrate)
+        else:
+            gcode = _GCODE_G1_Z % (z, feedrate)
+        return await self._send_move(gcode, Position(pos.x, pos.y, z))
+    
+    async def _move_path_unchecked(self, points: List[Tuple[float, float, float]], feedrate: int) -> CommandAck:
+        """Stream the path's G1 moves to the printer and wait for an 'ok' per move."""
         if self.emergency_stop_active:
-            return CommandAck(
-                id=f"move_nozzle_{int(time.time() * 1000)}",
-                status=CommandStatus.ERROR,
-                message="Emergency stop active",
-                timestamp=time.time()
-            )
+            return self._ack(CommandStatus.ERROR, "Emergency stop active")
+        if not points:
+            return self._ack(CommandStatus.OK, "Path of 0 moves completed")
+        if not self.printer_serial or not self.printer_serial.is_open:
+            return self._ack(CommandStatus.ERROR, "Printer serial port not open")
         
-        # Send G-code to printer
-        # NOTE: If your printer has Y and Z axes physically swapped, swap them here
-        # The printer firmware expects Y and Z in a certain order based on how motors are wired
-        # If Y button moves Z axis and vice versa, swap y and z in the G-code command
-        # For now, we'll add a config option to handle this
-        swap_yz = self.config.get('printer', {}).get('swap_yz_axes', False)
-        
-        if swap_yz:
-            # Swap Y and Z when sending to printer (hardware has them swapped)
-            gcode = f"G1 X{x:.3f} Y{z:.3f} Z{y:.3f} F{feedrate}"
-            # Store position correctly in our coordinate system
-            self.nozzle_pos = Position(x, y, z)
+        if self._swap_yz:
+            payloads = [_GCODE_G1 % (x, z, y, feedrate) for x, y, z in points]
         else:
-            # Normal operation - no swap
-            # G1 = Linear move, F = feedrate (speed)
-            gcode = f"G1 X{x:.3f} Y{y:.3f} Z{z:.3f} F{feedrate}"
-            self.nozzle_pos = Position(x, y, z)
+            payloads = [_GCODE_G1 % (x, y, z, feedrate) for x, y, z in points]
+        self.nozzle_pos = Position(*points[-1])
+        self._pos_confirmed = False
+        
+        # Marlin only acks a move once it fits in the planner, so allow each
+        # move the single-move timeout
+        try:
+            line, _ = await self._run_serial(self._transact_path, payloads, 30.0)
+        except (serial.SerialException, OSError) as e:
+            return self._ack(CommandStatus.ERROR, f"Serial error: {e}")
+        
+        if line is None:
+            return self._ack(CommandStatus.ERROR, f"Timeout waiting for 'ok' responses to path of {len(points)} moves")
+        if not line.startswith(b'ok'):
+            return self._ack(CommandStatus.ERROR, f"Printer error: {line.decode('utf-8', 'replace')}")
+        self._pos_confirmed = True
+        self.system_status = SystemStatus.MOVING
+        self.nozzle_moving = True
+        return self._ack(CommandStatus.OK, f"Path of {len(points)} moves completed")
+    
+    async def _send_move(self, gcode: bytes, target: Position) -> CommandAck:
+        """Send an encoded G1 move and record the target as the new nozzle position."""
+        if self.emergency_stop_active:
+            return self._ack(CommandStatus.ERROR, "Emergency stop active")
+        
+        # Skip the serial round trip when the printer is already commanded there
+        pos = self.nozzle_pos
+        if (self._pos_confirmed and abs(target.x - pos.x) < _POS_EPSILON
+                and abs(target.y - pos.y) < _POS_EPSILON and abs(target.z - pos.z) < _POS_EPSILON):
+            return self._ack(CommandStatus.OK, "Already at target position")
+        
+        self.nozzle_pos = target
+        self._pos_confirmed = False
         
         # Use the helper method to send G-code and wait for 'ok'
         # Movement commands may take longer, so use a longer timeout
-        ack = await self._send_gcode(gcode, timeout=30.0)
+        ack = await self._send_gcode_bytes(gcode, timeout=30.0, pipelined=True)
         
         if ack.status == CommandStatus.OK:
+            self._pos_confirmed = True
             # Update system status to moving, then back to idle
             self.system_status = SystemStatus.MOVING
             self.nozzle_moving = True
@@ -244,42 +603,33 @@ class ConnectedHardware(HardwareInterface):
         
         return ack
     
-    async def move_nozzle_xy(self, x: float, y: float, feedrate: int) -> CommandAck:
-        """Move printer nozzle XY only (Z unchanged)."""
-        return await self.move_nozzle(x, y, self.nozzle_pos.z, feedrate)
-    
-    async def move_nozzle_z(self, z: float, feedrate: int) -> CommandAck:
-        """Move printer nozzle Z only (XY unchanged)."""
-        return await self.move_nozzle(self.nozzle_pos.x, self.nozzle_pos.y, z, feedrate)
-    
     async def get_nozzle_position(self) -> Position:
         """Get current nozzle position."""
         # In a real implementation, this would query the printer for current position
         # For now, return the last known position
         # Position is always stored correctly in our coordinate system (x, y, z)
         # regardless of how it's sent to the printer
-        return Position(self.nozzle_pos.x, self.nozzle_pos.y, self.nozzle_pos.z)
+        # Position is immutable, so the stored instance can be shared without copying
+        return self.nozzle_pos
     
     async def home_nozzle(self) -> CommandAck:
         """Home the nozzle to origin (0, 0, 0) using G28 command."""
         if self.emergency_stop_active:
-            return CommandAck(
-                id=f"home_nozzle_{int(time.time() * 1000)}",
-                status=CommandStatus.ERROR,
-                message="Emergency stop active",
-                timestamp=time.time()
-            )
+            return self._ack(CommandStatus.ERROR, "Emergency stop active")
         
         # G28 = Auto Home (moves all axes to the limit switches)
         # Homing can take 30-60 seconds, so use a longer timeout
         self.system_status = SystemStatus.HOMING
+        # Where the nozzle ends up is unknown until G28 is acknowledged
+        self._pos_confirmed = False
         ack = await self._send_gcode("G28", timeout=60.0)
         
         if ack.status == CommandStatus.OK:
             # Update position to origin after successful homing
-            self.nozzle_pos = Position(0.0, 0.0, 0.0)
+            self.nozzle_pos = ORIGIN
+            self._pos_confirmed = True
             self.system_status = SystemStatus.IDLE
-            ack.message = "Homing completed"
+            ack = replace(ack, message="Homing completed")
         else:
             self.system_status = SystemStatus.ERROR
         
@@ -290,35 +640,31 @@ class ConnectedHardware(HardwareInterface):
         """Emergency stop all movement using M112 command."""
         self.emergency_stop_active = True
         self.nozzle_moving = False
+        self._pos_confirmed = False
         self.system_status = SystemStatus.EMERGENCY_STOP
         
         # M112 = Emergency stop G-code
         # Don't wait for response - emergency stop should be immediate
         if self.printer_serial and self.printer_serial.is_open:
-            # Serial.write() is blocking, run it in executor
-            def _write_emergency_stop():
-                self.printer_serial.write(b"M112\n")
-            
-            await self._run_in_executor(_write_emergency_stop)
-        
-        return CommandAck(
-            id=f"emergency_stop_{int(time.time() * 1000)}",
-            status=CommandStatus.OK,
-            message="Emergency stop activated",
-            timestamp=time.time()
-        )
+            # Written inline rather than queued on the serial thread, which may
+            # be blocked for up to a minute waiting on a G28 reply. Five bytes
+            # go straight into the TTY buffer, so skipping the executor hop
+            # doesn't stall the loop. Writing while another thread reads is safe.
+            self.printer_serial.write(b"M112\n")
+            # A halted printer won't send the 'ok's owed to pipelined moves;
+            # queued so it runs once the serial thread is free
+            self._serial_executor.submit(self._reset_reply_state)
+        
+        return self._ack(CommandStatus.OK, "Emergency stop activated")
     
     async def clear_emergency_stop(self) -> CommandAck:
         """Clear emergency stop condition."""
         self.emergency_stop_active = False
         self.system_status = SystemStatus.IDLE
+        if self.printer_serial and self.printer_serial.is_open:
+            await self._run_serial(self._reset_reply_state)
         
-        return CommandAck(
-            id=f"clear_emergency_stop_{int(time.time() * 1000)}",
-            status=CommandStatus.OK,
-            message="Emergency stop cleared",
-            timestamp=time.time()
-        )
+        return self._ack(CommandStatus.OK, "Emergency stop cleared")
     
     # Camera methods
     async def start_camera_stream(self) -> str:
@@ -326,14 +672,14 @@ class ConnectedHardware(HardwareInterface):
         if not self.camera_streaming:
             self.stream_url = f"http://localhost:5001/stream"
             self.camera_streaming = True
-            print(f"Starting camera stream at {self.stream_url}")
+            self.logger.info("Starting camera stream at %s", self.stream_url)
         return self.stream_url
     
     async def stop_camera_stream(self) -> bool:
         """Stop camera preview stream."""
         self.camera_streaming = False
         self.stream_url = None
-        print("Camera stream stopped")
+        self.logger.info("Camera stream stopped")
         return True
     
     async def capture_high_res(self) -> str:
@@ -343,56 +689,39 @@ class ConnectedHardware(HardwareInterface):
         
         # In a real implementation, this would use picamera2 to capture
         filename = f"capture_{int(time.time() * 1000)}.jpg"
-        print(f"Capturing high-res image: {filename}")
+        self.logger.info("Capturing high-res image: %s", filename)
         return filename
     
     async def get_temperature(self) -> Dict[str, Any]:
         """
         Query printer temperature using M105 command.
         
+        A temperature report seen in any reply within the last second is
+        returned without sending M105 again.
+        
         Returns:
             Dict with 'nozzle_temp' and 'bed_temp' if successful, None otherwise
         """
         if not self.printer_serial or not self.printer_serial.is_open:
             return None
         
+        requested_ns = time.monotonic_ns()
+        if self._temps is not None and requested_ns - self._temps_ns < _TEMP_MAX_AGE_NS:
+            return dict(self._temps)
+        
         # M105 = Report Temperature
-        # Send command (blocking, run in executor)
-        def _write_temp_query():
-            self.printer_serial.write(b"M105\n")
-        
-        await self._run_in_executor(_write_temp_query)
-        
-        # Read response (M105 typically returns something like "ok T:25.0 /0.0 B:25.0 /0.0")
-        start_time = time.time()
-        while (time.time() - start_time) < 2.0:  # 2 second timeout
-            try:
-                # Serial.readline() is blocking, run it in executor
-                def _read_temp_line():
-                    return self.printer_serial.readline().decode('utf-8').strip()
-                
-                line = await self._run_in_executor(_read_temp_line)
-                
-                if line:
-                    # Parse temperature from response
-                    # Format is typically: "ok T:25.0 /200.0 B:60.0 /60.0"
-                    # T = current nozzle temp, / = target nozzle temp
-                    # B = current bed temp, / = target bed temp
-                    import re
-                    temp_match = re.search(r'T:([\d.]+)', line)
-                    bed_match = re.search(r'B:([\d.]+)', line)
-                    
-                    if temp_match and bed_match:
-                        return {
-                            'nozzle_temp': float(temp_match.group(1)),
-                            'bed_temp': float(bed_match.group(1))
-                        }
-                    if 'ok' in line.lower():
-                        break  # Got ok but couldn't parse temps
-            except Exception:
-                await asyncio.sleep(0.1)
-                continue
+        # Response is typically "ok T:25.0 /200.0 B:60.0 /60.0" (some firmware
+        # reports temperatures on a line before the 'ok')
+        # T = current nozzle temp, / = target nozzle temp
+        # B = current bed temp, / = target bed temp
+        try:
+            await self._run_serial(self._transact, b"M105\n", 2.0)
+        except (serial.SerialException, OSError):
+            return None
         
+        # _transact records any temperature report it reads, including this reply
+        if self._temps is not None and self._temps_ns >= requested_ns:
+            return dict(self._temps)
         return None
     
     async def get_firmware_info(self) -> Optional[str]:
@@ -406,55 +735,31 @@ class ConnectedHardware(HardwareInterface):
             return None
         
         # M115 = Get Firmware Version and Capabilities
-        # Serial.write() is blocking, run it in executor
-        def _write_firmware_query():
-            self.printer_serial.write(b"M115\n")
-        
-        await self._run_in_executor(_write_firmware_query)
-        
-        # Read response (may be multiple lines)
-        start_time = time.time()
-        info_lines = []
-        while (time.time() - start_time) < 3.0:  # 3 second timeout
-            try:
-                # Serial.readline() is blocking, run it in executor
-                def _read_firmware_line():
-                    return self.printer_serial.readline().decode('utf-8').strip()
-                
-                line = await self._run_in_executor(_read_firmware_line)
-                
-                if line:
-                    if 'ok' in line.lower():
-                        break
-                    info_lines.append(line)
-            except Exception:
-                await asyncio.sleep(0.1)
-                continue
+        # Response is several info lines followed by 'ok'
+        try:
+            _, info_lines = await self._run_serial(self._transact, b"M115\n", 3.0)
+        except (serial.SerialException, OSError):
+            return None
         
-        return '\n'.join(info_lines) if info_lines else None
+        return b'\n'.join(info_lines).decode('utf-8', 'replace') if info_lines else None
     
     # Telemetry and status
     async def get_telemetry(self) -> TelemetryData:
         """Get current system telemetry."""
         return TelemetryData(
             timestamp=time.time(),
-            nozzle=Position(self.nozzle_pos.x, self.nozzle_pos.y, self.nozzle_pos.z),
+            nozzle=self.nozzle_pos,  # Immutable, safe to share
             status=self.system_status,
             error_message=None
         )
     
     async def is_ready(self) -> bool:
         """Check if hardware is ready for commands."""
-        if self.emergency_stop_active or self.system_status in [SystemStatus.ERROR, SystemStatus.EMERGENCY_STOP]:
-            return False
-        if not (self.pi and self.pi.connected and self.printer_serial and self.printer_serial.is_open):
-            return False
-        return True
+        return (self._pi_connected and self._serial_open and not self.emergency_stop_active
+                and self.system_status not in _NOT_READY_STATUSES)
     
     # Safety and limits
     def check_nozzle_limits(self, x: float, y: float, z: float) -> bool:
         """Check if nozzle position is within safe limits."""
-        limits = self.config['printer']['safe_limits']
-        return (limits['x_min'] <= x <= limits['x_max'] and 
-                limits['y_min'] <= y <= limits['y_max'] and
-                limits['z_min'] <= z <= limits['z_max'])
+        x_min, x_max, y_min, y_max, z_min, z_max = self._limits
+        return x_min <= x <= x_max and y_min <= y <= y_max and z_min <= z <= z_max
@@ -9,6 +9,12 @@ from .abstract_hardware import HardwareInterface
 from .test_hardware import TestHardware
 from .connected_hardware import ConnectedHardware
 
+# Hardware implementation for each supported mode
+_REGISTRY = {
+    "test": TestHardware,
+    "connected": ConnectedHardware,
+}
+
 
 def create_hardware(mode: str, config: Dict[str, Any]) -> HardwareInterface:
     """
@@ -26,9 +32,9 @@ def create_hardware(mode: str, config: Dict[str, Any]) -> HardwareInterface:
     Raises:
         ValueError: If mode is not supported
     """
-    if mode == "test":
-        return TestHardware(config)
-    elif mode == "connected":
-        return ConnectedHardware(config)
-    else:
-        raise ValueError(f"Unknown hardware mode: {mode}. Must be 'test' or 'connected'")
+    try:
+        hardware_class = _REGISTRY[mode]
+    except KeyError:
+        modes = " or ".join(f"'{name}'" for name in _REGISTRY)
+        raise ValueError(f"Unknown hardware mode: {mode}. Must be {modes}") from None
+    return hardware_class(config)
@@ -6,24 +6,47 @@ Does NOT send actual Arduino commands - only simulates the behavior.
 """
 
 import asyncio
+import math
 import time
 import random
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from .abstract_hardware import (
-    HardwareInterface, Position, CommandAck, 
+    HardwareInterface, Position, ORIGIN, CommandAck, 
     CommandStatus, SystemStatus, TelemetryData
 )
 
+_NOT_READY_STATUSES = frozenset((SystemStatus.ERROR, SystemStatus.EMERGENCY_STOP))
+
+
+def _resolve(future: asyncio.Future, value: bool):
+    """Set a future's result unless the move already finished."""
+    if not future.done():
+        future.set_result(value)
+
 
 class TestHardware(HardwareInterface):
     """Test hardware implementation with realistic simulation (no actual Arduino commands)."""
     
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
-        self.nozzle_pos = Position(0.0, 0.0, 0.0)
+        self.nozzle_pos = ORIGIN
         self.nozzle_moving = False
         self.camera_streaming = False
         self.stream_url = None
+        # Simulated moves in progress, oldest first: wakeup future ->
+        # (start, target, monotonic start time, duration). Each future is
+        # resolved when its move ends: True on arrival, False on emergency stop
+        self._motions: Dict[asyncio.Future, Tuple[Position, Position, float, float]] = {}
+        # Simulation settings are read once instead of on every move
+        self._movement_delay = self.config.get('simulation', {}).get('movement_delay', 0.1)
+        # Scales simulated durations: 1.0 = real time, 0 = instant (e.g. for scripted runs)
+        self._realtime_factor = float(self.config.get('simulation', {}).get('realtime_factor', 1.0))
+        self._home_feedrate = self.config.get('printer', {}).get('move_feedrate_default', 1500)
+        # Safe limits are read once; check_nozzle_limits runs on every move
+        limits = self.config['printer']['safe_limits']
+        self._limits = tuple(float(limits[key]) for key in (
+            'x_min', 'x_max', 'y_min', 'y_max', 'z_min', 'z_max'
+        ))
         
     async def initialize(self) -> bool:
         """Initialize test hardware simulation."""
@@ -54,118 +77,145 @@ class TestHardware(HardwareInterface):
     async def move_nozzle(self, x: float, y: float, z: float, feedrate: int) -> CommandAck:
         """Move printer nozzle to specified position (simulated - no Arduino command sent)."""
         if not self.check_nozzle_limits(x, y, z):
-            return CommandAck(
-                id=f"move_nozzle_{int(time.time() * 1000)}",
-                status=CommandStatus.ERROR,
-                message="Position outside safe limits",
-                timestamp=time.time()
-            )
+            return self._ack(CommandStatus.ERROR, "Position outside safe limits")
         
         if self.emergency_stop_active:
-            return CommandAck(
-                id=f"move_nozzle_{int(time.time() * 1000)}",
-                status=CommandStatus.ERROR,
-                message="Emergency stop active",
-                timestamp=time.time()
-            )
+            return self._ack(CommandStatus.ERROR, "Emergency stop active")
+        
+        # Already there: skip the simulated movement delay entirely
+        pos = self._current_position()
+        if (not self.nozzle_moving and abs(x - pos.x) < 1e-4
+                and abs(y - pos.y) < 1e-4 and abs(z - pos.z) < 1e-4):
+            return self._ack(CommandStatus.OK, "Already at target position (simulated)")
         
         self.nozzle_moving = True
         self.system_status = SystemStatus.MOVING
         
         # Simulate realistic movement time
-        distance = ((x - self.nozzle_pos.x)**2 + (y - self.nozzle_pos.y)**2 + (z - self.nozzle_pos.z)**2)**0.5
+        distance = math.dist((x, y, z), (pos.x, pos.y, pos.z))
         move_time = (distance / feedrate) * 60  # Convert to seconds
         
-        # Simulate gradual movement
-        movement_delay = self.config.get('simulation', {}).get('movement_delay', 0.1)
-        steps = max(1, int(move_time * 10))  # 10 updates per second
-        for i in range(steps):
-            if self.emergency_stop_active:
+        # Simulate gradual movement: one movement_delay per 0.1s of travel
+        steps = max(1, int(move_time * 10))
+        if not await self._simulate_motion(Position(x, y, z), steps * self._movement_delay):
+            self.nozzle_moving = False
+            self.system_status = SystemStatus.EMERGENCY_STOP
+            return self._ack(CommandStatus.ERROR, "Emergency stop during movement")
+        
+        self.nozzle_moving = False
+        self.system_status = SystemStatus.IDLE
+        
+        print(f"[TEST MODE] Simulated nozzle movement to ({x:.2f}, {y:.2f}, {z:.2f}) - no Arduino command sent")
+        
+        return self._ack(CommandStatus.OK, "Movement completed (simulated)")
+    
+    async def _move_path_unchecked(self, points: List[Tuple[float, float, float]], feedrate: int) -> CommandAck:
+        """Simulate a multi-point path as one command with a single ack (simulated)."""
+        if self.emergency_stop_active:
+            return self._ack(CommandStatus.ERROR, "Emergency stop active")
+        
+        self.nozzle_moving = True
+        self.system_status = SystemStatus.MOVING
+        for x, y, z in points:
+            pos = self.nozzle_pos
+            distance = math.dist((x, y, z), (pos.x, pos.y, pos.z))
+            steps = max(1, int((distance / feedrate) * 60 * 10))
+            if not await self._simulate_motion(Position(x, y, z), steps * self._movement_delay):
                 self.nozzle_moving = False
                 self.system_status = SystemStatus.EMERGENCY_STOP
-                return CommandAck(
-                    id=f"move_nozzle_{int(time.time() * 1000)}",
-                    status=CommandStatus.ERROR,
-                    message="Emergency stop during movement",
-                    timestamp=time.time()
-                )
-            
-            progress = (i + 1) / steps
-            self.nozzle_pos.x = self.nozzle_pos.x + (x - self.nozzle_pos.x) * progress
-            self.nozzle_pos.y = self.nozzle_pos.y + (y - self.nozzle_pos.y) * progress
-            self.nozzle_pos.z = self.nozzle_pos.z + (z - self.nozzle_pos.z) * progress
-            await asyncio.sleep(movement_delay)
+                return self._ack(CommandStatus.ERROR, "Emergency stop during movement")
         
         self.nozzle_moving = False
         self.system_status = SystemStatus.IDLE
         
-        print(f"[TEST MODE] Simulated nozzle movement to ({x:.2f}, {y:.2f}, {z:.2f}) - no Arduino command sent")
+        print(f"[TEST MODE] Simulated path of {len(points)} moves - no Arduino command sent")
         
-        return CommandAck(
-            id=f"move_nozzle_{int(time.time() * 1000)}",
-            status=CommandStatus.OK,
-            message="Movement completed (simulated)",
-            timestamp=time.time()
-        )
+        return self._ack(CommandStatus.OK, f"Path of {len(points)} moves completed (simulated)")
     
     async def move_nozzle_xy(self, x: float, y: float, feedrate: int) -> CommandAck:
         """Move printer nozzle XY only (Z unchanged)."""
-        return await self.move_nozzle(x, y, self.nozzle_pos.z, feedrate)
+        return await self.move_nozzle(x, y, self._current_position().z, feedrate)
     
     async def move_nozzle_z(self, z: float, feedrate: int) -> CommandAck:
         """Move printer nozzle Z only (XY unchanged)."""
-        return await self.move_nozzle(self.nozzle_pos.x, self.nozzle_pos.y, z, feedrate)
+        pos = self._current_position()
+        return await self.move_nozzle(pos.x, pos.y, z, feedrate)
     
     async def get_nozzle_position(self) -> Position:
         """Get current nozzle position."""
-        return Position(self.nozzle_pos.x, self.nozzle_pos.y, self.nozzle_pos.z)
+        return self._current_position()
+    
+    def _current_position(self) -> Position:
+        """Nozzle position, interpolated along the latest simulated move if one is in progress."""
+        if not self._motions:
+            # Position is immutable, so the stored instance can be shared without copying
+            return self.nozzle_pos
+        start, target, started, duration = next(reversed(self._motions.values()))
+        progress = min(1.0, (time.monotonic() - started) / duration) if duration > 0 else 1.0
+        return Position(
+            start.x + (target.x - start.x) * progress,
+            start.y + (target.y - start.y) * progress,
+            start.z + (target.z - start.z) * progress
+        )
+    
+    async def _simulate_motion(self, target: Position, duration: float) -> bool:
+        """
+        Simulate travel from the current position to target over duration seconds.
+        
+        Waits once for the whole move rather than stepping; positions along the
+        way are interpolated on read (see _current_position). An emergency stop
+        ends the wait early, leaving the nozzle where it had got to.
+        
+        Returns:
+            bool: True if the target was reached, False if stopped
+        """
+        duration *= self._realtime_factor
+        loop = asyncio.get_running_loop()
+        wakeup = loop.create_future()
+        self._motions[wakeup] = (self._current_position(), target, time.monotonic(), duration)
+        timer = loop.call_later(duration, _resolve, wakeup, True)
+        arrived = False
+        try:
+            arrived = await wakeup
+        finally:
+            timer.cancel()
+            # Only this move's entry is dropped; a later move still in
+            # progress keeps driving the reported position
+            self.nozzle_pos = target if arrived else self._current_position()
+            del self._motions[wakeup]
+        return arrived
     
     async def home_nozzle(self) -> CommandAck:
         """Home the nozzle to origin (0, 0, 0) - simulated."""
         if self.emergency_stop_active:
-            return CommandAck(
-                id=f"home_nozzle_{int(time.time() * 1000)}",
-                status=CommandStatus.ERROR,
-                message="Emergency stop active",
-                timestamp=time.time()
-            )
+            return self._ack(CommandStatus.ERROR, "Emergency stop active")
         
         self.nozzle_moving = True
         self.system_status = SystemStatus.MOVING
         
         # Simulate homing movement
-        distance = ((self.nozzle_pos.x)**2 + (self.nozzle_pos.y)**2 + (self.nozzle_pos.z)**2)**0.5
+        pos = self.nozzle_pos
+        distance = math.hypot(pos.x, pos.y, pos.z)
         
         # If already at origin, skip movement simulation
         if distance < 0.01:  # Already at origin (within 0.01mm)
-            self.nozzle_pos = Position(0.0, 0.0, 0.0)
+            self.nozzle_pos = ORIGIN
             self.nozzle_moving = False
             self.system_status = SystemStatus.IDLE
             print("[TEST MODE] Nozzle already at origin - homing skipped", flush=True)
         else:
-            default_feedrate = self.config.get('printer', {}).get('move_feedrate_default', 1500)
-            movement_delay = self.config.get('simulation', {}).get('movement_delay', 0.1)
-            move_time = (distance / default_feedrate) * 60
+            move_time = (distance / self._home_feedrate) * 60
             steps = max(1, int(move_time * 10))
+            if not await self._simulate_motion(ORIGIN, steps * self._movement_delay):
+                self.nozzle_moving = False
+                self.system_status = SystemStatus.EMERGENCY_STOP
+                return self._ack(CommandStatus.ERROR, "Emergency stop during homing")
             
-            for i in range(steps):
-                progress = (i + 1) / steps
-                self.nozzle_pos.x = self.nozzle_pos.x * (1 - progress)
-                self.nozzle_pos.y = self.nozzle_pos.y * (1 - progress)
-                self.nozzle_pos.z = self.nozzle_pos.z * (1 - progress)
-                await asyncio.sleep(movement_delay)
-            
-            self.nozzle_pos = Position(0.0, 0.0, 0.0)
             self.nozzle_moving = False
             self.system_status = SystemStatus.IDLE
             print(f"[TEST MODE] Simulated nozzle homing from distance {distance:.2f}mm - no Arduino command sent")
         
-        return CommandAck(
-            id=f"home_nozzle_{int(time.time() * 1000)}",
-            status=CommandStatus.OK,
-            message="Homing completed (simulated)",
-            timestamp=time.time()
-        )
+        return self._ack(CommandStatus.OK, "Homing completed (simulated)")
     
     # Emergency stop
     async def emergency_stop(self) -> CommandAck:
@@ -174,14 +224,16 @@ class TestHardware(HardwareInterface):
         self.nozzle_moving = False
         self.system_status = SystemStatus.EMERGENCY_STOP
         
+        for wakeup in list(self._motions):
+            # The move may be waiting on another thread's event loop
+            try:
+                wakeup.get_loop().call_soon_threadsafe(_resolve, wakeup, False)
+            except RuntimeError:
+                pass  # That loop already closed; the move has finished
+        
         print("EMERGENCY STOP ACTIVATED")
         
-        return CommandAck(
-            id=f"emergency_stop_{int(time.time() * 1000)}",
-            status=CommandStatus.OK,
-            message="Emergency stop activated",
-            timestamp=time.time()
-        )
+        return self._ack(CommandStatus.OK, "Emergency stop activated")
     
     async def clear_emergency_stop(self) -> CommandAck:
         """Clear emergency stop condition."""
@@ -190,12 +242,7 @@ class TestHardware(HardwareInterface):
         
         print("Emergency stop cleared")
         
-        return CommandAck(
-            id=f"clear_emergency_stop_{int(time.time() * 1000)}",
-            status=CommandStatus.OK,
-            message="Emergency stop cleared",
-            timestamp=time.time()
-        )
+        return self._ack(CommandStatus.OK, "Emergency stop cleared")
     
     # Camera methods
     async def start_camera_stream(self) -> str:
@@ -219,7 +266,7 @@ class TestHardware(HardwareInterface):
             return ""
         
         # Simulate capture delay
-        await asyncio.sleep(0.5)
+        await asyncio.sleep(0.5 * self._realtime_factor)
         
         filename = f"capture_{int(time.time() * 1000)}.jpg"
         print(f"Simulating high-res capture: {filename}")
@@ -230,21 +277,17 @@ class TestHardware(HardwareInterface):
         """Get current system telemetry."""
         return TelemetryData(
             timestamp=time.time(),
-            nozzle=Position(self.nozzle_pos.x, self.nozzle_pos.y, self.nozzle_pos.z),
+            nozzle=self._current_position(),
             status=self.system_status,
             error_message=None
         )
     
     async def is_ready(self) -> bool:
         """Check if hardware is ready for commands."""
-        if self.emergency_stop_active or self.system_status in [SystemStatus.ERROR, SystemStatus.EMERGENCY_STOP]:
-            return False
-        return True
+        return not self.emergency_stop_active and self.system_status not in _NOT_READY_STATUSES
     
     # Safety and limits
     def check_nozzle_limits(self, x: float, y: float, z: float) -> bool:
         """Check if nozzle position is within safe limits."""
-        limits = self.config['printer']['safe_limits']
-        return (limits['x_min'] <= x <= limits['x_max'] and 
-                limits['y_min'] <= y <= limits['y_max'] and
-                limits['z_min'] <= z <= limits['z_max'])
+        x_min, x_max, y_min, y_max, z_min, z_max = self._limits
+        return x_min <= x <= x_max and y_min <= y <= y_max and z_min <= z <= z_max
@@ -13,17 +13,89 @@ import argparse
 import yaml
 import time
 import io
+import json
+import hashlib
+import logging
 import threading
 from flask import Flask, render_template, jsonify, Response, request
 from flask_socketio import SocketIO, emit
 from hw.hardware_factory import create_hardware
-from hw.abstract_hardware import CommandStatus, SystemStatus
+from hw.abstract_hardware import CommandAck, CommandStatus, SystemStatus, next_command_id
+
+try:
+    import orjson  # Optional: faster JSON for SocketIO payloads
+except ImportError:
+    orjson = None
+
+# libyaml's C parser when PyYAML was built with it; same safe subset of YAML
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Per-frame and per-request messages; startup progress still goes to print
+logger = logging.getLogger('server')
+
+
+# multipart/x-mixed-replace framing around each JPEG in the /stream response
+_FRAME_PREFIX = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+_FRAME_TRAILER = b'\r\n'
+# Trailer of one frame and prefix of the next, sent as one write between frames
+_FRAME_SEPARATOR = _FRAME_TRAILER + _FRAME_PREFIX
+
+# Picamera2 pixel formats -> simplejpeg colorspace (byte order in memory)
+_JPEG_COLORSPACES = {
+    'XBGR8888': 'RGBX',
+    'XRGB8888': 'BGRX',
+    'RGB888': 'BGR',
+    'BGR888': 'RGB',
+}
+
+
+class _OrjsonCodec:
+    """json-module stand-in for SocketIO backed by orjson (dumps must return str)."""
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    @staticmethod
+    def loads(data, **kwargs):
+        return orjson.loads(data)
+
+
+def _ack_payload(ack) -> dict:
+    """SocketIO payload for a CommandAck."""
+    return {
+        'id': ack.id,
+        'status': ack.status.value,
+        'message': ack.message,
+        'timestamp': ack.timestamp
+    }
 
 
 def load_config(config_file: str) -> dict:
     """Load configuration from YAML file."""
     with open(config_file, 'r') as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YamlLoader)
+
+
+class StreamingOutput(io.BufferedIOBase):
+    """Holds the latest JPEG frame and wakes every client waiting for the next one."""
+    
+    def __init__(self):
+        self.frame = None
+        self.condition = threading.Condition()
+        # Optional callable(frame) run for each frame, outside the lock
+        self.on_frame = None
+    
+    def write(self, buf):
+        # Only the newest frame is kept; slow clients skip frames
+        # instead of holding up the camera
+        with self.condition:
+            self.frame = buf
+            self.condition.notify_all()
+        on_frame = self.on_frame
+        if on_frame is not None:
+            on_frame(buf)
+        return len(buf)
 
 
 class CameraStream:
@@ -34,6 +106,13 @@ class CameraStream:
         self.mode = mode
         self.picam2 = None
         self.camera_lock = threading.Lock()
+        # Latest JPEG frame, shared by all /stream clients
+        self.output = StreamingOutput()
+        # True when the camera's MJPEG encoder feeds self.output directly;
+        # otherwise a capture thread encodes frames in software
+        self._hardware_encoding = False
+        self._capture_thread = None
+        self._stop_capture = threading.Event()
     
     def get_camera(self):
         """Initialize and return camera instance."""
@@ -55,6 +134,17 @@ class CameraStream:
                             self.picam2 = Picamera2()
                             print("  Camera object created (auto-detect), configuring...", flush=True)
                         
+                        # Frame buffers from the cached dma-heap: the software JPEG path reads
+                        # them on the CPU, which is many times slower from uncached memory.
+                        # Newer Picamera2 releases already default to this allocator.
+                        try:
+                            from picamera2.allocators import DmaAllocator
+                            if not isinstance(self.picam2.allocator, DmaAllocator):
+                                self.picam2.allocator = DmaAllocator()
+                                print("  Using dma-heap frame buffers", flush=True)
+                        except Exception as e:
+                            print(f"  Note: dma-heap allocator unavailable ({e}), using default buffers", flush=True)
+                        
                         # Print camera info for debugging
                         try:
                             camera_info = self.picam2.camera_properties
@@ -75,9 +165,11 @@ class CameraStream:
                         # Create video configuration - keep basic controls only
                         # Quality controls will be applied after camera starts
                         # For HQ Camera (IMX477) with manual focus C-mount lens
+                        # YUV420 is the encoders' native input and 1.5 bytes/pixel
+                        # instead of 4 for RGB, so each frame moves far less memory
                         try:
                             video_config = self.picam2.create_video_configuration(
-                                main={"size": (preview_width, preview_height)},
+                                main={"size": (preview_width, preview_height), "format": "YUV420"},
                                 controls={"FrameRate": preview_fps}
                             )
                             print(f"  Video config created: {preview_width}x{preview_height} @ {preview_fps}fps", flush=True)
@@ -88,13 +180,13 @@ class CameraStream:
                             preview_width, preview_height = 1280, 720
                             preview_fps = 15
                             video_config = self.picam2.create_video_configuration(
-                                main={"size": (preview_width, preview_height)},
+                                main={"size": (preview_width, preview_height), "format": "YUV420"},
                                 controls={"FrameRate": preview_fps}
                             )
                         
                         self.picam2.configure(video_config)
                         print("  Camera configured, starting...", flush=True)
-                        self.picam2.start()
+                        self._start_camera()
                         print("  Camera started, waiting for stabilization...", flush=True)
                         
                         # Allow camera to stabilize
@@ -169,55 +261,148 @@ class CameraStream:
                         raise
         return self.picam2
     
-    def generate_frames(self):
-        """Generator function that yields MJPEG frames."""
+    def _start_camera(self):
+        """
+        Start the camera, recording through the hardware MJPEG encoder if possible.
+        
+        The encoder writes each frame straight into self.output at the configured
+        frame rate, so no CPU time goes on JPEG encoding. Boards without a hardware
+        JPEG encoder (e.g. Pi 5) fall back to software capture in _capture_loop.
+        """
+        if self.config.get('stream', {}).get('hardware_encoder', True):
+            try:
+                from picamera2.encoders import MJPEGEncoder
+                from picamera2.outputs import FileOutput
+                self.picam2.start_recording(MJPEGEncoder(), FileOutput(self.output))
+                self._hardware_encoding = True
+                print("  Streaming via hardware MJPEG encoder", flush=True)
+                return
+            except Exception as e:
+                print(f"  Note: Hardware MJPEG encoder unavailable ({e}), using software JPEG capture", flush=True)
+        self.picam2.start()
+    
+    def _ensure_capture_thread(self, camera):
+        """Start the background capture thread if it isn't running yet."""
+        with self.camera_lock:
+            if self._hardware_encoding:
+                return  # The encoder is already producing frames
+            if self._capture_thread is None or not self._capture_thread.is_alive():
+                self._capture_thread = threading.Thread(
+                    target=self._capture_loop, args=(camera,), name="camera_capture", daemon=True
+                )
+                self._capture_thread.start()
+    
+    def _tune_capture_thread(self):
+        """
+        Optionally pin the capture thread to CPUs and give it a real-time
+        priority, for an even frame cadence while Flask threads are busy.
+        
+        Both settings are opt-in; SCHED_FIFO needs root or CAP_SYS_NICE.
+        Failures are logged and capture carries on with normal scheduling.
+        """
+        stream_config = self.config.get('stream', {})
+        cpus = stream_config.get('capture_thread_cpus')
+        priority = int(stream_config.get('capture_thread_rt_priority', 0))
         try:
-            camera = self.get_camera()
-        except Exception as e:
-            print(f"Failed to get camera: {e}", flush=True)
-            # Yield an error frame instead of crashing
-            error_frame = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + b'\xff\xd8\xff\xe0' + b'\r\n'
-            yield error_frame
-            return
+            if cpus:
+                # pid 0 = the calling thread on Linux
+                os.sched_setaffinity(0, set(cpus))
+            if priority > 0:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        except (AttributeError, OSError, ValueError) as e:
+            logger.warning("Could not apply capture thread CPU/priority settings: %s", e)
+    
+    def _capture_loop(self, camera):
+        """Capture JPEG frames and publish the latest one to waiting clients."""
+        self._tune_capture_thread()
+        import simplejpeg  # Installed with picamera2
         
+        jpeg_quality = int(self.config.get('camera', {}).get('jpeg_quality', 85))
+        main_config = camera.camera_configuration()['main']
+        width, height = main_config['size']
+        yuv = main_config['format'] == 'YUV420'
+        colorspace = _JPEG_COLORSPACES.get(main_config['format'], 'RGBX')
         frame_count = 0
-        print("Starting frame generation loop...", flush=True)
-        while True:
+        logger.info("Starting frame capture loop...")
+        while not self._stop_capture.is_set():
             try:
-                # Use capture_file which handles JPEG encoding efficiently
-                # This is the recommended method for MJPEG streaming
-                # JPEG quality is set via camera controls (see get_camera method)
-                stream = io.BytesIO()
-                camera.capture_file(stream, format='jpeg')
-                stream.seek(0)
-                frame_bytes = stream.getvalue()
+                # Encode the raw frame straight to JPEG bytes; no BytesIO
+                # round trip or getvalue() copy per frame
+                array = camera.capture_array("main")
+                if yuv:
+                    # Planar YUV420: full-size Y rows, then the U and V planes at
+                    # half width (rows may be padded to the stride, hence the slicing)
+                    halves = array.reshape((array.shape[0] * 2, array.shape[1] // 2))
+                    frame_bytes = simplejpeg.encode_jpeg_yuv_planes(
+                        array[:height, :width],
+                        halves[2 * height:2 * height + height // 2, :width // 2],
+                        halves[2 * height + height // 2:, :width // 2],
+                        quality=jpeg_quality
+                    )
+                else:
+                    frame_bytes = simplejpeg.encode_jpeg(
+                        array, quality=jpeg_quality, colorspace=colorspace, colorsubsampling='420'
+                    )
                 
                 if len(frame_bytes) == 0:
-                    print("Warning: Empty frame captured", flush=True)
+                    logger.warning("Empty frame captured")
                     time.sleep(0.1)
                     continue
                 
                 frame_count += 1
                 if frame_count == 1:
-                    print(f"✓ First frame captured: {len(frame_bytes)} bytes", flush=True)
+                    logger.info("First frame captured: %d bytes", len(frame_bytes))
                 elif frame_count % 30 == 0:
-                    print(f"Streaming: {frame_count} frames captured", flush=True)
+                    logger.debug("Streaming: %d frames captured", frame_count)
                 
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-                # Adjust sleep based on configured FPS
-                fps = self.config.get('stream', {}).get('preview_fps', 30)
-                time.sleep(1.0 / fps)
+                # No sleep here: capture_array blocks until the camera delivers
+                # the next frame, so the configured FrameRate sets the pace
+                self.output.write(frame_bytes)
             except Exception as e:
-                print(f"Frame capture error: {e}", flush=True)
-                import traceback
-                traceback.print_exc()
+                logger.exception("Frame capture error: %s", e)
                 time.sleep(1)  # Wait longer on error before retrying
     
+    def start(self):
+        """Start the camera and frame production if not already running."""
+        self._ensure_capture_thread(self.get_camera())
+    
+    def generate_frames(self):
+        """Generator function that yields MJPEG frames."""
+        try:
+            camera = self.get_camera()
+        except Exception as e:
+            print(f"Failed to get camera: {e}", flush=True)
+            # Yield an error frame instead of crashing
+            error_frame = _FRAME_PREFIX + b'\xff\xd8\xff\xe0' + _FRAME_TRAILER
+            yield error_frame
+            return
+        
+        # One encoder (or capture thread) feeds every client, so each extra
+        # viewer costs no extra camera reads or JPEG encodes
+        self._ensure_capture_thread(camera)
+        output = self.output
+        # Frames are yielded as-is between constant separators rather than
+        # concatenated, so no per-frame copy of the JPEG is made
+        separator = _FRAME_PREFIX
+        while True:
+            with output.condition:
+                if not output.condition.wait(timeout=2.0):
+                    continue  # No new frame yet (camera stalled or recovering)
+                frame_bytes = output.frame
+            yield separator
+            yield frame_bytes
+            separator = _FRAME_SEPARATOR
+    
     def cleanup(self):
         """Cleanup camera resources."""
+        self._stop_capture.set()
+        if self._capture_thread is not None:
+            self._capture_thread.join(timeout=2.0)
         if self.picam2:
-            self.picam2.stop()
+            if self._hardware_encoding:
+                self.picam2.stop_recording()
+            else:
+                self.picam2.stop()
             self.picam2.close()
 
 
@@ -239,23 +424,45 @@ def create_app(mode: str, config: dict):
         app, 
         cors_allowed_origins="*",
         async_mode='threading',  # Use threading mode for better compatibility
+        **({'json': _OrjsonCodec} if orjson is not None else {}),
         logger=False,  # Disable verbose logging to reduce noise
         engineio_logger=False  # Disable engineio logging
     )
     
+    # Every hardware coroutine runs on one long-lived event loop thread
+    # instead of a fresh loop per command, so the hardware's asyncio state
+    # (e.g. the command queue lock) always belongs to the same loop
+    hw_loop = asyncio.new_event_loop()
+    threading.Thread(target=hw_loop.run_forever, name="hw_loop", daemon=True).start()
+    
+    def run_hw(coro, timeout=None):
+        """Run a hardware coroutine on the shared loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, hw_loop).result(timeout)
+    
     app.hardware = hardware
+    app.hw_loop = hw_loop
+    app.run_hw = run_hw
     app.socketio = socketio
     app.mode = mode
+    # Last telemetry broadcast, sent to clients as they connect
+    app._telemetry_payload = None
     app.camera_stream = camera_stream
     
     @app.route('/test')
     def test():
         return "Server is working!"
     
+    index_page = None
+    
     @app.route('/')
     def index():
-        print(f"Serving index page for {mode} mode")
-        return render_template('index.html', mode=mode)
+        nonlocal index_page
+        logger.debug("Serving index page for %s mode", mode)
+        # The page only depends on mode, so it is rendered on the first request
+        # (url_for needs a request context) and reused after that
+        if index_page is None:
+            index_page = render_template('index.html', mode=mode)
+        return index_page
     
     @app.route('/stream')
     def stream():
@@ -272,29 +479,38 @@ def create_app(mode: str, config: dict):
                 }
             )
         except Exception as e:
-            print(f"Stream error: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
+            logger.exception("Stream error: %s", e)
             return f"Stream error: {e}", 500
     
     @app.route('/capture', methods=['POST'])
     def capture():
-        filename = asyncio.run(hardware.capture_high_res())
+        filename = run_hw(hardware.capture_high_res())
         return jsonify({'filename': filename, 'success': True})
     
+    # Config values used per request are read once here
+    default_feedrate = config.get('printer', {}).get('move_feedrate_default', 1500)
+    safe_limits = config.get('printer', {}).get('safe_limits', {})
+    ui_config = {
+        'x_min': safe_limits.get('x_min', 0),
+        'x_max': safe_limits.get('x_max', 220),
+        'y_min': safe_limits.get('y_min', 0),
+        'y_max': safe_limits.get('y_max', 220),
+        'z_min': safe_limits.get('z_min', 0),
+        'z_max': safe_limits.get('z_max', 250),
+        'move_feedrate_default': default_feedrate
+    }
+    
+    # Serialized once; browsers revalidate with the ETag and get a bodyless 304
+    ui_config_body = json.dumps(ui_config).encode()
+    ui_config_etag = hashlib.sha1(ui_config_body).hexdigest()
+    
     @app.route('/config')
     def get_config():
         """Return printer safe limits and settings for 3D visualization."""
-        safe_limits = config.get('printer', {}).get('safe_limits', {})
-        return jsonify({
-            'x_min': safe_limits.get('x_min', 0),
-            'x_max': safe_limits.get('x_max', 220),
-            'y_min': safe_limits.get('y_min', 0),
-            'y_max': safe_limits.get('y_max', 220),
-            'z_min': safe_limits.get('z_min', 0),
-            'z_max': safe_limits.get('z_max', 250),
-            'move_feedrate_default': config.get('printer', {}).get('move_feedrate_default', 1500)
-        })
+        response = app.response_class(ui_config_body, mimetype='application/json')
+        response.set_etag(ui_config_etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     
     @socketio.on('connect')
     def handle_connect():
@@ -304,25 +520,30 @@ def create_app(mode: str, config: dict):
                 client_addr = request.remote_addr if hasattr(request, 'remote_addr') else 'unknown'
             except:
                 client_addr = 'unknown'
-            print(f"Client connecting from {client_addr}...", flush=True)
+            logger.debug("Client connecting from %s...", client_addr)
             # Emit status after connection is established
             try:
                 emit('status', {'mode': mode, 'connected': True})
             except Exception as emit_error:
-                print(f"Warning: Failed to emit status: {emit_error}", flush=True)
+                logger.warning("Failed to emit status: %s", emit_error)
+            
+            # Telemetry is only pushed when it changes, so give a new client
+            # the latest state straight away
+            if app._telemetry_payload is not None:
+                try:
+                    emit('telemetry.position', app._telemetry_payload)
+                except Exception as emit_error:
+                    logger.warning("Failed to emit telemetry: %s", emit_error)
             
             # Start telemetry when first client connects
             if not hasattr(app, '_telemetry_started'):
                 app._telemetry_started = True
-                def telemetry_task():
-                    time.sleep(0.5)  # Small delay
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        while True:
-                            try:
-                                telemetry = loop.run_until_complete(hardware.get_telemetry())
-                                socketio.emit('telemetry.position', {
+                async def telemetry_task():
+                    # Runs on the hardware loop and broadcasts each change
+                    while True:
+                        try:
+                            async for telemetry in hardware.telemetry_stream(0.5):
+                                payload = {
                                     'timestamp': telemetry.timestamp,
                                     'nozzle': {
                                         'x': telemetry.nozzle.x,
@@ -330,31 +551,22 @@ def create_app(mode: str, config: dict):
                                         'z': telemetry.nozzle.z
                                     },
                                     'status': telemetry.status.value
-                                })
-                            except Exception as e:
-                                print(f"Telemetry error: {e}", flush=True)
-                            time.sleep(0.5)
-                    except KeyboardInterrupt:
-                        pass
-                    except Exception as e:
-                        print(f"Telemetry task error: {e}", flush=True)
-                    finally:
-                        try:
-                            loop.close()
-                        except:
-                            pass
+                                }
+                                app._telemetry_payload = payload
+                                socketio.emit('telemetry.position', payload)
+                        except Exception as e:
+                            logger.warning("Telemetry error: %s", e)
+                            await asyncio.sleep(0.5)
                 
                 try:
-                    socketio.start_background_task(telemetry_task)
-                    print("Telemetry task started", flush=True)
+                    asyncio.run_coroutine_threadsafe(telemetry_task(), hw_loop)
+                    logger.info("Telemetry task started")
                 except Exception as e:
-                    print(f"Failed to start telemetry task: {e}", flush=True)
+                    logger.error("Failed to start telemetry task: %s", e)
             
-            print(f"Client connected successfully from {client_addr}", flush=True)
+            logger.info("Client connected from %s", client_addr)
         except Exception as e:
-            print(f"Error in handle_connect: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in handle_connect: %s", e)
             # Don't re-raise - let the connection proceed even if there's an error
     
     @socketio.on('disconnect')
@@ -363,160 +575,200 @@ def create_app(mode: str, config: dict):
             client_addr = request.remote_addr if hasattr(request, 'remote_addr') else 'unknown'
         except:
             client_addr = 'unknown'
-        print(f"Client disconnected from {client_addr}", flush=True)
+        stop_sending_frames(request.sid)
+        logger.info("Client disconnected from %s", client_addr)
     
-    @socketio.on('cmd.move_nozzle')
-    def handle_move_nozzle_command(data):
-        def execute_move():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                default_feedrate = config.get('printer', {}).get('move_feedrate_default', 1500)
-                ack = loop.run_until_complete(hardware.move_nozzle(
-                    data.get('x', 0),
-                    data.get('y', 0),
-                    data.get('z', 0),
-                    data.get('feedrate', default_feedrate)
-                ))
-                emit('telemetry.command_ack', {
-                    'id': ack.id,
-                    'status': ack.status.value,
-                    'message': ack.message,
-                    'timestamp': ack.timestamp
-                })
-            finally:
-                loop.close()
-        socketio.start_background_task(execute_move)
-    
-    @socketio.on('cmd.move_nozzle_xy')
-    def handle_move_nozzle_xy_command(data):
-        def execute_move():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                default_feedrate = config.get('printer', {}).get('move_feedrate_default', 1500)
-                ack = loop.run_until_complete(hardware.move_nozzle_xy(
-                    data.get('x', 0),
-                    data.get('y', 0),
-                    data.get('feedrate', default_feedrate)
-                ))
-                emit('telemetry.command_ack', {
-                    'id': ack.id,
-                    'status': ack.status.value,
-                    'message': ack.message,
-                    'timestamp': ack.timestamp
-                })
-            finally:
-                loop.close()
-        socketio.start_background_task(execute_move)
-    
-    @socketio.on('cmd.move_nozzle_z')
-    def handle_move_nozzle_z_command(data):
-        def execute_move():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                default_feedrate = config.get('printer', {}).get('move_feedrate_default', 1500)
-                ack = loop.run_until_complete(hardware.move_nozzle_z(
-                    data.get('z', 0),
-                    data.get('feedrate', default_feedrate)
-                ))
-                emit('telemetry.command_ack', {
-                    'id': ack.id,
-                    'status': ack.status.value,
-                    'message': ack.message,
-                    'timestamp': ack.timestamp
-                })
-            finally:
-                loop.close()
-        socketio.start_background_task(execute_move)
-    
-    @socketio.on('cmd.home_nozzle')
-    def handle_home_nozzle():
-        def execute_home():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+    # Camera frames over the socket: the sids subscribed to them, and those
+    # still owing an ack for their previous frame. Like slow /stream clients,
+    # a client skips frames until it has caught up, so nothing queues up
+    frame_subscribers = set()
+    frames_in_flight = set()
+    frame_lock = threading.Lock()
+    
+    def frame_acked(sid):
+        with frame_lock:
+            frames_in_flight.discard(sid)
+    
+    def send_frame(frame):
+        """StreamingOutput.on_frame hook; runs on the camera thread."""
+        with frame_lock:
+            ready = frame_subscribers - frames_in_flight
+            frames_in_flight.update(ready)
+        if not ready:
+            return
+        # Encoder output is already bytes; only copy other buffer types
+        if not isinstance(frame, bytes):
+            frame = bytes(frame)
+        for sid in ready:
+            socketio.emit('stream.frame', frame, to=sid,
+                          callback=lambda *args, sid=sid: frame_acked(sid))
+    
+    def stop_sending_frames(sid):
+        with frame_lock:
+            frame_subscribers.discard(sid)
+            frames_in_flight.discard(sid)
+            if not frame_subscribers:
+                camera_stream.output.on_frame = None
+    
+    @socketio.on('stream.subscribe')
+    def handle_stream_subscribe():
+        # Binary alternative to /stream: each JPEG goes out as one WebSocket
+        # message, with no multipart framing
+        with frame_lock:
+            frame_subscribers.add(request.sid)
+            camera_stream.output.on_frame = send_frame
+        
+        def start_camera():
             try:
-                ack = loop.run_until_complete(hardware.home_nozzle())
-                emit('telemetry.command_ack', {
-                    'id': ack.id,
-                    'status': ack.status.value,
-                    'message': ack.message,
-                    'timestamp': ack.timestamp
-                })
-            finally:
-                loop.close()
-        socketio.start_background_task(execute_home)
-    
-    @socketio.on('cmd.emergency_stop')
-    def handle_emergency_stop():
-        def execute_emergency_stop():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+                camera_stream.start()
+            except Exception as e:
+                logger.error("Failed to start camera for stream subscriber: %s", e)
+        socketio.start_background_task(start_camera)
+    
+    @socketio.on('stream.unsubscribe')
+    def handle_stream_unsubscribe():
+        stop_sending_frames(request.sid)
+    
+    def command_handler(start_command):
+        """
+        Build a SocketIO handler for a hardware command.
+        
+        start_command(data) returns the hardware coroutine for the event's data.
+        It is scheduled on the hardware loop and the handler returns at once;
+        the ack is emitted to the requesting client when the command finishes.
+        """
+        def handler(data=None):
+            sid = request.sid
             try:
-                ack = loop.run_until_complete(hardware.emergency_stop())
-                emit('telemetry.command_ack', {
-                    'id': ack.id,
-                    'status': ack.status.value,
-                    'message': ack.message,
-                    'timestamp': ack.timestamp
-                })
-            finally:
-                loop.close()
-        socketio.start_background_task(execute_emergency_stop)
+                coro = start_command(data or {})
+            except (AttributeError, TypeError, ValueError) as e:
+                # Malformed event data (e.g. "x": "abc") is rejected here,
+                # before anything reaches the hardware
+                emit('telemetry.command_ack', _ack_payload(CommandAck(
+                    id=next_command_id(),
+                    status=CommandStatus.ERROR,
+                    message=f"Invalid command parameters: {e}",
+                    timestamp=time.time()
+                )))
+                return
+            future = asyncio.run_coroutine_threadsafe(coro, hw_loop)
+            
+            def send_ack(future):
+                try:
+                    ack = future.result()
+                except Exception as e:
+                    logger.exception("Command failed: %s", e)
+                    return
+                socketio.emit('telemetry.command_ack', _ack_payload(ack), to=sid)
+            future.add_done_callback(send_ack)
+        return handler
+    
+    # Event fields are coerced to the types the hardware expects; bad values
+    # raise here and are answered with an error ack by command_handler
+    socketio.on('cmd.move_nozzle')(command_handler(lambda data: hardware.move_nozzle(
+        float(data.get('x', 0)),
+        float(data.get('y', 0)),
+        float(data.get('z', 0)),
+        int(data.get('feedrate', default_feedrate))
+    )))
+    socketio.on('cmd.move_nozzle_xy')(command_handler(lambda data: hardware.move_nozzle_xy(
+        float(data.get('x', 0)),
+        float(data.get('y', 0)),
+        int(data.get('feedrate', default_feedrate))
+    )))
+    socketio.on('cmd.move_nozzle_z')(command_handler(lambda data: hardware.move_nozzle_z(
+        float(data.get('z', 0)),
+        int(data.get('feedrate', default_feedrate))
+    )))
+    socketio.on('cmd.home_nozzle')(command_handler(lambda data: hardware.home_nozzle()))
+    socketio.on('cmd.emergency_stop')(command_handler(lambda data: hardware.emergency_stop()))
     
     return app
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Printer Interface Server')
-    parser.add_argument('--mode', choices=['test', 'connected'], 
-                       default=os.getenv('MODE', 'test'),
-                       help='Hardware mode: test (simulation) or connected (real hardware)')
-    parser.add_argument('--config', default=None,
-                       help='Configuration file path (default: config_{mode}.yml)')
-    parser.add_argument('--port', type=int, default=5000, help='Port to run server on')
-    parser.add_argument('--host', default='0.0.0.0', help='Host to bind server to')
-    
-    args = parser.parse_args()
+def build_app(mode: str, config_file: str = None):
+    """
+    Load config, create the app and initialize its hardware.
     
-    config = load_config(args.config or f'config_{args.mode}.yml')
-    
-    print(f"Starting {args.mode} mode server on {args.host}:{args.port}", flush=True)
+    Exits the process if the hardware fails to initialize. Used by both
+    main() and the gunicorn entry point (wsgi_app).
+    """
+    config = load_config(config_file or f'config_{mode}.yml')
     
     print("Creating Flask app...", flush=True)
-    app = create_app(args.mode, config)
+    app = create_app(mode, config)
     print("Flask app created.", flush=True)
     
     # Initialize hardware - fail fast on error
     async def init_hardware():
-        print(f"Initializing {args.mode} hardware...", flush=True)
+        print(f"Initializing {mode} hardware...", flush=True)
         try:
             if not await app.hardware.initialize():
-                print(f"ERROR: Failed to initialize {args.mode} hardware", flush=True)
-                sys.exit(1)
-            print(f"{args.mode.capitalize()} hardware initialized successfully", flush=True)
+                print(f"ERROR: Failed to initialize {mode} hardware", flush=True)
+                return False
+            print(f"{mode.capitalize()} hardware initialized successfully", flush=True)
+            return True
         except Exception as e:
             print(f"ERROR: Exception during hardware initialization: {e}", flush=True)
             import traceback
             traceback.print_exc()
-            sys.exit(1)
+            return False
     
     print("Running hardware initialization...", flush=True)
-    asyncio.run(init_hardware())
+    # On the shared hardware loop, where every later command will run
+    if not app.run_hw(init_hardware()):
+        sys.exit(1)
     print("Hardware initialization complete.", flush=True)
     
-    print("Starting server...")
-    print("Press Ctrl+C to stop")
-    
     import atexit
     def cleanup():
         print("\nCleaning up...")
         app.camera_stream.cleanup()
-        asyncio.run(app.hardware.shutdown())
+        app.run_hw(app.hardware.shutdown(), timeout=10.0)
+        app.hw_loop.call_soon_threadsafe(app.hw_loop.stop)
     atexit.register(cleanup)
     
+    return app
+
+
+def wsgi_app():
+    """
+    WSGI entry point for serving under gunicorn instead of the Werkzeug dev server.
+    
+    Mode and config file come from the MODE and CONFIG environment variables.
+    Run a single worker (hardware and SocketIO state live in-process) with
+    threads, matching SocketIO's threading async mode:
+    
+        MODE=connected gunicorn -w 1 --threads 100 -b 0.0.0.0:5000 'server:wsgi_app()'
+    """
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    return build_app(os.getenv('MODE', 'test'), os.getenv('CONFIG'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Printer Interface Server')
+    parser.add_argument('--mode', choices=['test', 'connected'], 
+                       default=os.getenv('MODE', 'test'),
+                       help='Hardware mode: test (simulation) or connected (real hardware)')
+    parser.add_argument('--config', default=None,
+                       help='Configuration file path (default: config_{mode}.yml)')
+    parser.add_argument('--port', type=int, default=5000, help='Port to run server on')
+    parser.add_argument('--host', default='0.0.0.0', help='Host to bind server to')
+    
+    args = parser.parse_args()
+    
+    # Hardware classes report progress through logging; show INFO on the console
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
+    print(f"Starting {args.mode} mode server on {args.host}:{args.port}", flush=True)
+    
+    app = build_app(args.mode, args.config)
+    
+    print("Starting server...")
+    print("Press Ctrl+C to stop")
+    
     print(f"Server ready at http://{args.host}:{args.port}")
+    # Werkzeug development server; see wsgi_app() for running under gunicorn
     app.socketio.run(app, host=args.host, port=args.port, debug=False, allow_unsafe_werkzeug=True)
 
 
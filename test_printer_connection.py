@@ -11,13 +11,14 @@ This script tests basic communication with the printer by:
 Usage:
     python test_printer_connection.py [PORT]
     
-    If PORT is not specified, it will try common ports:
-    - Linux/Pi: /dev/ttyUSB0, /dev/ttyACM0
-    - Windows: COM3, COM4
-    - Mac: /dev/tty.usbserial-*, /dev/tty.usbmodem*
+    If PORT is not specified, it will try each USB serial device that is
+    currently attached (e.g. /dev/ttyUSB0, /dev/ttyACM0, COM3,
+    /dev/cu.usbmodem*).
 """
 
 import serial
+from serial.tools import list_ports
+import re
 import time
 import sys
 import os
@@ -26,40 +27,19 @@ from typing import Optional, List
 
 # Configuration
 BAUD_RATE = 115200  # Anycubic Kobra 2 Neo standard speed
-INIT_WAIT_TIME = 3  # Seconds to wait after opening port (printer reboots)
+INIT_WAIT_TIME = 3  # Max seconds to wait after opening port (printer reboots)
+
+# Response parsing (M105 temperatures, M114 position)
+_T_RE = re.compile(r'T:([\d.]+)')
+_B_RE = re.compile(r'B:([\d.]+)')
+_POS_RE = re.compile(r'X:([\d.-]+)\s+Y:([\d.-]+)\s+Z:([\d.-]+)')
 
 
 def find_serial_ports() -> List[str]:
-    """Find available serial ports on the system."""
-    ports = []
-    
-    # Linux/Pi common ports
-    linux_ports = ['/dev/ttyUSB0', '/dev/ttyUSB1', '/dev/ttyACM0', '/dev/ttyACM1']
-    
-    # Windows common ports
-    windows_ports = [f'COM{i}' for i in range(1, 21)]
-    
-    # Mac common ports (check common patterns)
-    mac_patterns = ['/dev/tty.usbserial-', '/dev/tty.usbmodem', '/dev/cu.usbserial-', '/dev/cu.usbmodem']
-    
-    # Try to detect OS and suggest ports
-    if sys.platform.startswith('linux'):
-        ports.extend(linux_ports)
-    elif sys.platform.startswith('win'):
-        ports.extend(windows_ports)
-    elif sys.platform.startswith('darwin'):  # Mac
-        # Try to list actual ports
-        try:
-            import glob
-            for pattern in mac_patterns:
-                ports.extend(glob.glob(f'{pattern}*'))
-        except:
-            pass
-        # Fallback to common patterns
-        if not ports:
-            ports.extend([f'/dev/tty.usbserial-{i}' for i in range(10)])
-    
-    return ports
+    """Find USB serial devices currently attached to the system."""
+    # Only devices that actually exist, instead of guessing names to try
+    # (USB adapters and boards report a vendor ID; built-in UARTs don't)
+    return sorted(port.device for port in list_ports.comports() if port.vid is not None)
 
 
 def connect_printer(port: str) -> Optional[serial.Serial]:
@@ -69,9 +49,14 @@ def connect_printer(port: str) -> Optional[serial.Serial]:
         ser = serial.Serial(port, BAUD_RATE, timeout=1)
         
         # CRITICAL: When you open the port, the printer usually reboots (DTR reset).
-        # We must wait a few seconds for it to be ready.
-        print(f"Waiting {INIT_WAIT_TIME} seconds for printer to initialize after connection...")
-        time.sleep(INIT_WAIT_TIME)
+        # We must wait for it to be ready: Marlin prints "start" once it has
+        # booted, so stop waiting as soon as that (or its banner) shows up.
+        print(f"Waiting up to {INIT_WAIT_TIME} seconds for printer to initialize after connection...")
+        deadline = time.monotonic() + INIT_WAIT_TIME
+        while time.monotonic() < deadline:
+            line = ser.readline()
+            if b'start' in line.lower() or b'Marlin' in line:
+                break
         
         # Clear any startup text (like "Marlin x.x.x" or boot messages)
         ser.reset_input_buffer()
@@ -102,29 +87,55 @@ def send_gcode(ser: serial.Serial, command: str, timeout: float = 5.0) -> tuple[
     full_command = f"{command}\n"
     ser.write(full_command.encode('utf-8'))
     
-    # Read the response lines
-    start_time = time.time()
+    return _read_response(ser, 1, timeout)
+
+
+def send_gcodes(ser: serial.Serial, commands: List[str], timeout: float = 5.0) -> tuple[bool, str]:
+    """
+    Send several G-code commands in a single write and wait for an 'ok' for each.
+    
+    Marlin queues the commands and acknowledges them in order, so this costs one
+    round trip instead of one per command.
+    
+    Returns:
+        (success: bool, response: str)
+    """
+    if not ser or not ser.is_open:
+        return False, "Serial port not open"
+    
+    print(f"  Sending: {', '.join(commands)}")
+    
+    ser.write(''.join(f"{command}\n" for command in commands).encode('utf-8'))
+    
+    return _read_response(ser, len(commands), timeout)
+
+
+def _read_response(ser: serial.Serial, expected_oks: int, timeout: float) -> tuple[bool, str]:
+    """Read response lines until expected_oks 'ok' lines, an error, or timeout."""
+    deadline = time.monotonic() + timeout
     responses = []
+    oks = 0
     
-    while (time.time() - start_time) < timeout:
-        try:
-            line = ser.readline().decode('utf-8').strip()
-            if line:
-                responses.append(line)
-                print(f"    Printer says: {line}")
-                
-                # Standard Marlin firmware replies with "ok" when done
-                if line.lower().startswith('ok'):
-                    return True, '\n'.join(responses)
-                
-                # Check for errors
-                if 'error' in line.lower() or 'resend' in line.lower():
-                    return False, '\n'.join(responses)
-                    
-        except Exception as e:
-            # If readline times out or fails, continue waiting
-            time.sleep(0.1)
+    while time.monotonic() < deadline:
+        # readline blocks until a line arrives or the port timeout passes, so
+        # an empty read just loops; garbled bytes (e.g. line noise) are replaced
+        # rather than raising. Serial errors propagate to the caller.
+        line = ser.readline().decode('utf-8', errors='replace').strip()
+        if not line:
+            continue
+        responses.append(line)
+        print(f"    Printer says: {line}")
+        
+        # Standard Marlin firmware replies with "ok" when done
+        if line.lower().startswith('ok'):
+            oks += 1
+            if oks == expected_oks:
+                return True, '\n'.join(responses)
             continue
+        
+        # Check for errors
+        if 'error' in line.lower() or 'resend' in line.lower():
+            return False, '\n'.join(responses)
     
     # Timeout
     if responses:
@@ -159,9 +170,8 @@ def test_connection(ser: serial.Serial) -> bool:
     if success:
         print("  ✓ Temperature query successful")
         # Try to parse temperature
-        import re
-        temp_match = re.search(r'T:([\d.]+)', response)
-        bed_match = re.search(r'B:([\d.]+)', response)
+        temp_match = _T_RE.search(response)
+        bed_match = _B_RE.search(response)
         if temp_match and bed_match:
             print(f"  ✓ Nozzle temp: {temp_match.group(1)}°C, Bed temp: {bed_match.group(1)}°C")
     else:
@@ -170,12 +180,11 @@ def test_connection(ser: serial.Serial) -> bool:
     
     # Test 3: Set Safe Modes (G21, G90)
     print("\n[Test 3] Setting safe modes (G21: millimeters, G90: absolute)...")
-    success1, response1 = send_gcode(ser, "G21", timeout=2.0)
-    success2, response2 = send_gcode(ser, "G90", timeout=2.0)
-    if success1 and success2:
+    success, response = send_gcodes(ser, ["G21", "G90"], timeout=4.0)
+    if success:
         print("  ✓ Safe modes set successfully")
     else:
-        print(f"  ✗ Failed: G21={success1}, G90={success2}")
+        print(f"  ✗ Failed: {response}")
         all_passed = False
     
     # Test 4: Get Current Position (M114)
@@ -184,8 +193,7 @@ def test_connection(ser: serial.Serial) -> bool:
     if success:
         print("  ✓ Position query successful")
         # Try to parse position
-        import re
-        pos_match = re.search(r'X:([\d.-]+)\s+Y:([\d.-]+)\s+Z:([\d.-]+)', response)
+        pos_match = _POS_RE.search(response)
         if pos_match:
             x, y, z = pos_match.groups()
             print(f"  ✓ Current position: X={x}, Y={y}, Z={z}")
@@ -22,6 +22,7 @@ class PrinterInterface {
         this.needsRender = false; // Flag to indicate if render is needed
         this._waitingForThree = false; // Prevent duplicate waitForThreeAndInit calls
         this._visualizationInitialized = false; // Prevent duplicate initialization
+        this.cameraFrameUrl = null; // Object URL of the frame currently shown in the camera preview
         
         // Load config and initialize
         console.log('Starting config load...');
@@ -142,6 +143,11 @@ class PrinterInterface {
             console.log('✅ Connected to server via SocketIO');
             this.connected = true;
             this.updateConnectionStatus();
+            // Socket frames are opt-in (?stream=socket); by default the
+            // preview stays on the /stream MJPEG feed
+            if (new URLSearchParams(window.location.search).get('stream') === 'socket') {
+                this.socket.emit('stream.subscribe');
+            }
         });
         
         this.socket.on('connect_error', (error) => {
@@ -184,6 +190,16 @@ class PrinterInterface {
             this.handleCommandAck(data);
         });
         
+        // Camera frames as binary WebSocket messages; the <img> keeps using
+        // /stream until the first one arrives. The ack asks the server for the
+        // next frame (it skips frames for us until then)
+        this.socket.on('stream.frame', (buf, ack) => {
+            this.showCameraFrame(buf);
+            if (ack) {
+                ack();
+            }
+        });
+        
         // Check connection status after a short delay
         setTimeout(() => {
             if (!this.connected) {
@@ -192,6 +208,17 @@ class PrinterInterface {
         }, 2000);
     }
     
+    showCameraFrame(buf) {
+        const preview = document.getElementById('camera-preview');
+        if (!preview) return;
+        const previous = this.cameraFrameUrl;
+        this.cameraFrameUrl = URL.createObjectURL(new Blob([buf], { type: 'image/jpeg' }));
+        preview.src = this.cameraFrameUrl;
+        if (previous) {
+            URL.revokeObjectURL(previous);
+        }
+    }
+    
     bindEvents() {
         // Helper function to safely bind event
         const safeBind = (id, event, handler) => {